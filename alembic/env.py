@@ -17,6 +17,7 @@ from src.database import Base
 import importlib
 for module in (
     "src.inventory.models",
+    "src.flights.models",
 ):
     importlib.import_module(module)
 
@@ -0,0 +1,173 @@
+"""product stock summary
+
+Revision ID: 2c7d9e4a1f63
+Revises: 8b3e5d1f0a42
+Create Date: 2026-10-17 11:40:02.871355
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7d9e4a1f63'
+down_revision: Union[str, Sequence[str], None] = '8b3e5d1f0a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Recomputes the summary rows of the given products only. Quantities are
+# bucketed by the status of every assignment on the lot; lots without an
+# assignment count as 'unassigned'.
+PRODUCT_STOCK_REFRESH = """
+CREATE OR REPLACE FUNCTION product_stock_refresh(p_ids uuid[]) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_ids IS NULL OR cardinality(p_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM product_stock ps
+    WHERE ps.product_id = ANY (p_ids)
+      AND NOT EXISTS (SELECT 1 FROM lote_products lp WHERE lp.product_id = ps.product_id);
+
+    INSERT INTO product_stock AS ps
+        (product_id, total_quantity, lot_count, earliest_expiration, quantity_by_status, updated_at)
+    SELECT t.product_id,
+           t.total_quantity,
+           t.lot_count,
+           t.earliest_expiration,
+           coalesce(s.quantity_by_status, '{}'::jsonb),
+           now()
+    FROM (
+        SELECT product_id,
+               sum(quantity) AS total_quantity,
+               count(DISTINCT lot_id) AS lot_count,
+               min(expiration_date) FILTER (WHERE quantity > 0) AS earliest_expiration
+        FROM lote_products
+        WHERE product_id = ANY (p_ids)
+        GROUP BY product_id
+    ) t
+    LEFT JOIN (
+        SELECT product_id, jsonb_object_agg(status, quantity) AS quantity_by_status
+        FROM (
+            SELECT lp.product_id,
+                   coalesce(a.status::text, 'unassigned') AS status,
+                   sum(lp.quantity) AS quantity
+            FROM lote_products lp
+            LEFT JOIN assignments a ON a.lot_id = lp.lot_id
+            WHERE lp.product_id = ANY (p_ids)
+            GROUP BY 1, 2
+        ) per_status
+        GROUP BY product_id
+    ) s ON s.product_id = t.product_id
+    ON CONFLICT (product_id) DO UPDATE SET
+        total_quantity = excluded.total_quantity,
+        lot_count = excluded.lot_count,
+        earliest_expiration = excluded.earliest_expiration,
+        quantity_by_status = excluded.quantity_by_status,
+        updated_at = excluded.updated_at;
+END
+$$;
+"""
+
+# Statement-level triggers: a bulk merge of thousands of rows refreshes each
+# touched product once, not once per row.
+LOTE_PRODUCTS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION product_stock_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT product_id FROM new_rows UNION SELECT product_id FROM old_rows
+        ));
+    ELSE
+        PERFORM product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+ASSIGNMENTS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION product_stock_from_assignments() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (SELECT lot_id FROM new_rows)
+        ));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (
+                SELECT unnest(ARRAY[n.lot_id, o.lot_id])
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.status IS DISTINCT FROM o.status OR n.lot_id IS DISTINCT FROM o.lot_id
+            )
+        ));
+    ELSE
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (SELECT lot_id FROM old_rows)
+        ));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def _statement_triggers(table: str, function: str) -> None:
+    op.execute(f"""
+        CREATE TRIGGER {table}_stock_ins AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {table}_stock_upd AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {table}_stock_del AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_stock',
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('total_quantity', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('lot_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('earliest_expiration', sa.Date(), nullable=True),
+    sa.Column('quantity_by_status', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.execute(PRODUCT_STOCK_REFRESH)
+    op.execute(LOTE_PRODUCTS_TRIGGER_FN)
+    op.execute(ASSIGNMENTS_TRIGGER_FN)
+    _statement_triggers('lote_products', 'product_stock_from_lote_products')
+    _statement_triggers('assignments', 'product_stock_from_assignments')
+    op.execute("SELECT product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM lote_products))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('assignments', 'lote_products'):
+        for suffix in ('ins', 'upd', 'del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_stock_{suffix} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS product_stock_from_assignments()")
+    op.execute("DROP FUNCTION IF EXISTS product_stock_from_lote_products()")
+    op.execute("DROP FUNCTION IF EXISTS product_stock_refresh(uuid[])")
+    op.drop_table('product_stock')
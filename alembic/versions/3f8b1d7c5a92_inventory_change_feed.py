@@ -0,0 +1,128 @@
+"""inventory change feed
+
+Revision ID: 3f8b1d7c5a92
+Revises: 6a2e8f4c1b57
+Create Date: 2026-10-17 15:51:39.266014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8b1d7c5a92'
+down_revision: Union[str, Sequence[str], None] = '6a2e8f4c1b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CHANNEL = 'inventory_changes'
+
+# table -> (lot_id, product_id, flight expressions over alias {r}; UPDATE filter over n/o)
+FEED_TABLES = {
+    'lotes': (
+        "{r}.id, NULL::uuid, NULL::text",
+        "n.lote_code IS DISTINCT FROM o.lote_code",
+    ),
+    'products': (
+        "NULL::uuid, {r}.id, NULL::text",
+        "n.product_code IS DISTINCT FROM o.product_code OR n.product_name IS DISTINCT FROM o.product_name",
+    ),
+    'lote_products': (
+        "{r}.lot_id, {r}.product_id, NULL::text",
+        "true",
+    ),
+    'assignments': (
+        "{r}.lot_id, NULL::uuid, {r}.flight_assigned::text",
+        "true",
+    ),
+}
+
+# Appended ledger movements change the effective stock of a lot; rows the
+# ledger trigger mirrors from lote_products were already announced there.
+LEDGER_FEED_FN = f"""
+CREATE OR REPLACE FUNCTION stock_movements_feed_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('{CHANNEL}', json_build_object(
+        'table', TG_TABLE_NAME, 'op', 'insert', 'lot_id', c.lot_id, 'product_id', c.product_id, 'flight', NULL
+    )::text)
+    FROM (SELECT DISTINCT r.lot_id, r.product_id FROM new_rows r WHERE NOT r.applied) c;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def _feed_function(table: str, columns: str, changed: str) -> str:
+    # Statement-level: one NOTIFY per distinct (lot, product, flight) touched,
+    # however many rows the statement wrote.
+    def select(alias: str, source: str) -> str:
+        return f"SELECT {columns.format(r=alias)} FROM {source}"
+
+    joined = f"new_rows n JOIN old_rows o ON o.id = n.id WHERE {changed}"
+    return f"""
+CREATE OR REPLACE FUNCTION {table}_feed_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME, 'op', 'insert', 'lot_id', c.lot_id, 'product_id', c.product_id, 'flight', c.flight
+        )::text)
+        FROM ({select('r', 'new_rows r')}) AS c(lot_id, product_id, flight)
+        GROUP BY c.lot_id, c.product_id, c.flight;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME, 'op', 'update', 'lot_id', c.lot_id, 'product_id', c.product_id, 'flight', c.flight
+        )::text)
+        FROM ({select('n', joined)} UNION {select('o', joined)}) AS c(lot_id, product_id, flight);
+    ELSE
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'table', TG_TABLE_NAME, 'op', 'delete', 'lot_id', c.lot_id, 'product_id', c.product_id, 'flight', c.flight
+        )::text)
+        FROM ({select('r', 'old_rows r')}) AS c(lot_id, product_id, flight)
+        GROUP BY c.lot_id, c.product_id, c.flight;
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (columns, changed) in FEED_TABLES.items():
+        op.execute(_feed_function(table, columns, changed))
+        op.execute(f"""
+            CREATE TRIGGER {table}_feed_ins AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_feed_notify()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_feed_upd AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_feed_notify()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_feed_del AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_feed_notify()
+        """)
+    op.execute(LEDGER_FEED_FN)
+    op.execute("""
+        CREATE TRIGGER stock_movements_feed_ins AFTER INSERT ON stock_movements
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stock_movements_feed_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS stock_movements_feed_ins ON stock_movements")
+    op.execute("DROP FUNCTION IF EXISTS stock_movements_feed_notify()")
+    for table in FEED_TABLES:
+        for suffix in ('ins', 'upd', 'del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_feed_{suffix} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_feed_notify()")
@@ -0,0 +1,30 @@
+"""keyset pagination indexes
+
+Revision ID: 4f1a9c2e7b10
+Revises: cd2c639542a1
+Create Date: 2026-10-17 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1a9c2e7b10'
+down_revision: Union[str, Sequence[str], None] = 'cd2c639542a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_lotes_created_at_id', 'lotes', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lotes_created_at_id', table_name='lotes')
+    op.drop_index('ix_products_created_at_id', table_name='products')
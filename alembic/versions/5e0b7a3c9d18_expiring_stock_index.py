@@ -0,0 +1,37 @@
+"""expiring stock index
+
+Revision ID: 5e0b7a3c9d18
+Revises: 2c7d9e4a1f63
+Create Date: 2026-10-17 13:05:26.114870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7a3c9d18'
+down_revision: Union[str, Sequence[str], None] = '2c7d9e4a1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partial covering b-tree rather than BRIN: lote_products rows are not
+    # inserted in expiration order, so BRIN ranges would overlap almost fully.
+    op.create_index(
+        'ix_lote_products_expiring',
+        'lote_products',
+        ['expiration_date', 'product_id'],
+        unique=False,
+        postgresql_include=['quantity', 'lot_id'],
+        postgresql_where=sa.text('expiration_date IS NOT NULL AND quantity > 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lote_products_expiring', table_name='lote_products')
@@ -0,0 +1,106 @@
+"""stock movements ledger
+
+Revision ID: 6a2e8f4c1b57
+Revises: 9d4f2b6e8c31
+Create Date: 2026-10-17 15:08:13.427601
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2e8f4c1b57'
+down_revision: Union[str, Sequence[str], None] = '9d4f2b6e8c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Writes that go straight to lote_products are recorded as already-applied
+# movements so the ledger holds the full history. Compaction sets
+# app.compacting for its transaction: the movements it folds are in the
+# ledger already. Deletes cascaded from a lot or product are not recorded,
+# their movements are being deleted too.
+LEDGER_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION stock_movements_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('app.compacting', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT lot_id, product_id, quantity, 'direct_write', true
+        FROM new_rows WHERE quantity <> 0;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT n.lot_id, n.product_id, n.quantity - o.quantity, 'direct_write', true
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n.quantity <> o.quantity;
+    ELSE
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT o.lot_id, o.product_id, -o.quantity, 'direct_write', true
+        FROM old_rows o
+        WHERE o.quantity <> 0
+          AND EXISTS (SELECT 1 FROM lotes l WHERE l.id = o.lot_id)
+          AND EXISTS (SELECT 1 FROM products p WHERE p.id = o.product_id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_movements',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('lot_id', sa.UUID(), nullable=False),
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('delta', sa.Integer(), nullable=False),
+    sa.Column('reason', sa.String(length=40), nullable=False),
+    sa.Column('applied', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['lot_id'], ['lotes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movements_lot_id_created_at', 'stock_movements', ['lot_id', 'created_at'], unique=False)
+    op.create_index(
+        'ix_stock_movements_pending', 'stock_movements', ['id'],
+        unique=False, postgresql_where=sa.text('NOT applied'),
+    )
+    # Opening balance: current quantities become the first applied movements.
+    op.execute("""
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied, created_at)
+        SELECT lot_id, product_id, quantity, 'direct_write', true, updated_at
+        FROM lote_products WHERE quantity <> 0
+    """)
+    op.execute(LEDGER_TRIGGER_FN)
+    op.execute("""
+        CREATE TRIGGER lote_products_ledger_ins AFTER INSERT ON lote_products
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stock_movements_from_lote_products()
+    """)
+    op.execute("""
+        CREATE TRIGGER lote_products_ledger_upd AFTER UPDATE ON lote_products
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stock_movements_from_lote_products()
+    """)
+    op.execute("""
+        CREATE TRIGGER lote_products_ledger_del AFTER DELETE ON lote_products
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stock_movements_from_lote_products()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for suffix in ('ins', 'upd', 'del'):
+        op.execute(f"DROP TRIGGER IF EXISTS lote_products_ledger_{suffix} ON lote_products")
+    op.execute("DROP FUNCTION IF EXISTS stock_movements_from_lote_products()")
+    op.drop_index('ix_stock_movements_pending', table_name='stock_movements', postgresql_where=sa.text('NOT applied'))
+    op.drop_index('ix_stock_movements_lot_id_created_at', table_name='stock_movements')
+    op.drop_table('stock_movements')
@@ -0,0 +1,54 @@
+"""unique lote product pair
+
+Revision ID: 8b3e5d1f0a42
+Revises: 4f1a9c2e7b10
+Create Date: 2026-10-17 10:03:17.220964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e5d1f0a42'
+down_revision: Union[str, Sequence[str], None] = '4f1a9c2e7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fold duplicated (lot_id, product_id) rows into the oldest one before the
+    # constraint goes in.
+    op.execute(
+        """
+        UPDATE lote_products lp
+        SET quantity = d.total
+        FROM (
+            SELECT (array_agg(id ORDER BY created_at, id))[1] AS keep_id, sum(quantity) AS total
+            FROM lote_products
+            GROUP BY lot_id, product_id
+            HAVING count(*) > 1
+        ) d
+        WHERE lp.id = d.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM lote_products a
+        USING lote_products b
+        WHERE a.lot_id = b.lot_id
+          AND a.product_id = b.product_id
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+        """
+    )
+    op.create_unique_constraint(
+        'uq_lote_products_lot_id_product_id', 'lote_products', ['lot_id', 'product_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_lote_products_lot_id_product_id', 'lote_products', type_='unique')
@@ -0,0 +1,92 @@
+"""row versions
+
+Revision ID: 9d4f2b6e8c31
+Revises: 5e0b7a3c9d18
+Create Date: 2026-10-17 14:22:47.503918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f2b6e8c31'
+down_revision: Union[str, Sequence[str], None] = '5e0b7a3c9d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = ('products', 'lotes', 'lote_products')
+LOT_CHILD_TABLES = ('lote_products', 'assignments')
+
+# Every UPDATE bumps the row version, whether it comes from the ORM, Core or raw SQL.
+BUMP_ROW_VERSION_FN = """
+CREATE OR REPLACE FUNCTION bump_row_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END
+$$;
+"""
+
+# Touching the parent lot bumps its version through bump_row_version, so a
+# lot ETag also changes when any of its items or assignments does.
+TOUCH_LOTES_FN = """
+CREATE OR REPLACE FUNCTION lotes_touch_from_children() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE lotes SET updated_at = now() WHERE id IN (SELECT lot_id FROM new_rows);
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE lotes SET updated_at = now()
+        WHERE id IN (SELECT lot_id FROM new_rows UNION SELECT lot_id FROM old_rows);
+    ELSE
+        UPDATE lotes SET updated_at = now() WHERE id IN (SELECT lot_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(BUMP_ROW_VERSION_FN)
+    op.execute(TOUCH_LOTES_FN)
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.BigInteger(), server_default=sa.text('1'), nullable=False))
+        op.execute(f"""
+            CREATE TRIGGER {table}_version BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION bump_row_version()
+        """)
+    for table in LOT_CHILD_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_ins AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_upd AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_del AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in LOT_CHILD_TABLES:
+        for suffix in ('ins', 'upd', 'del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_lot_touch_{suffix} ON {table}")
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+        op.drop_column(table, 'version')
+    op.execute("DROP FUNCTION IF EXISTS lotes_touch_from_children()")
+    op.execute("DROP FUNCTION IF EXISTS bump_row_version()")
@@ -0,0 +1,49 @@
+"""search indexes
+
+Revision ID: b71c4e9a2d05
+Revises: 3f8b1d7c5a92
+Create Date: 2026-10-17 16:34:05.918273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71c4e9a2d05'
+down_revision: Union[str, Sequence[str], None] = '3f8b1d7c5a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Prefix search: lower(code) LIKE 'abc%' needs text_pattern_ops under a non-C collation.
+    op.create_index('ix_products_product_code_prefix', 'products', [sa.text('lower(product_code) text_pattern_ops')], unique=False)
+    op.create_index('ix_lotes_lote_code_prefix', 'lotes', [sa.text('lower(lote_code) text_pattern_ops')], unique=False)
+    # Fuzzy search: word_similarity (<%) over trigrams.
+    op.create_index(
+        'ix_products_product_code_trgm', 'products', ['product_code'],
+        unique=False, postgresql_using='gin', postgresql_ops={'product_code': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_products_product_name_trgm', 'products', ['product_name'],
+        unique=False, postgresql_using='gin', postgresql_ops={'product_name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_lotes_lote_code_trgm', 'lotes', ['lote_code'],
+        unique=False, postgresql_using='gin', postgresql_ops={'lote_code': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lotes_lote_code_trgm', table_name='lotes', postgresql_using='gin')
+    op.drop_index('ix_products_product_name_trgm', table_name='products', postgresql_using='gin')
+    op.drop_index('ix_products_product_code_trgm', table_name='products', postgresql_using='gin')
+    op.drop_index('ix_lotes_lote_code_prefix', table_name='lotes')
+    op.drop_index('ix_products_product_code_prefix', table_name='products')
+    # pg_trgm is left installed: other objects may depend on it.
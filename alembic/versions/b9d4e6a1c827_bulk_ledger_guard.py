@@ -0,0 +1,90 @@
+"""bulk ledger guard
+
+Revision ID: b9d4e6a1c827
+Revises: f6c2b8d4a719
+Create Date: 2026-10-17 20:14:52.906318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4e6a1c827'
+down_revision: Union[str, Sequence[str], None] = 'f6c2b8d4a719'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same body as 6a2e8f4c1b57, plus app.bulk: the COPY merge records one
+# aggregated 'bulk_import' movement per lot item itself, in the same statement.
+LEDGER_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION stock_movements_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('app.compacting', true) = 'on'
+       OR current_setting('app.bulk', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT lot_id, product_id, quantity, 'direct_write', true
+        FROM new_rows WHERE quantity <> 0;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT n.lot_id, n.product_id, n.quantity - o.quantity, 'direct_write', true
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n.quantity <> o.quantity;
+    ELSE
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT o.lot_id, o.product_id, -o.quantity, 'direct_write', true
+        FROM old_rows o
+        WHERE o.quantity <> 0
+          AND EXISTS (SELECT 1 FROM lotes l WHERE l.id = o.lot_id)
+          AND EXISTS (SELECT 1 FROM products p WHERE p.id = o.product_id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+# Body from migration 6a2e8f4c1b57, restored on downgrade.
+PREVIOUS_LEDGER_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION stock_movements_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('app.compacting', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT lot_id, product_id, quantity, 'direct_write', true
+        FROM new_rows WHERE quantity <> 0;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT n.lot_id, n.product_id, n.quantity - o.quantity, 'direct_write', true
+        FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n.quantity <> o.quantity;
+    ELSE
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT o.lot_id, o.product_id, -o.quantity, 'direct_write', true
+        FROM old_rows o
+        WHERE o.quantity <> 0
+          AND EXISTS (SELECT 1 FROM lotes l WHERE l.id = o.lot_id)
+          AND EXISTS (SELECT 1 FROM products p WHERE p.id = o.product_id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(LEDGER_TRIGGER_FN)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(PREVIOUS_LEDGER_TRIGGER_FN)
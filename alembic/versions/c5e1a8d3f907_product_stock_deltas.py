@@ -0,0 +1,332 @@
+"""product stock deltas
+
+Revision ID: c5e1a8d3f907
+Revises: e4a9c7f2b315
+Create Date: 2026-10-17 18:05:31.417920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a8d3f907'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c7f2b315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Adds per-status deltas into a summary's counts; empty buckets are dropped.
+PRODUCT_STOCK_ADD_COUNTS = """
+CREATE OR REPLACE FUNCTION product_stock_add_counts(counts jsonb, deltas jsonb) RETURNS jsonb
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+    FROM (
+        SELECT key, sum(value::bigint) AS total
+        FROM (
+            SELECT key, value FROM jsonb_each_text(coalesce(counts, '{}'::jsonb))
+            UNION ALL
+            SELECT key, value FROM jsonb_each_text(coalesce(deltas, '{}'::jsonb))
+        ) kv
+        GROUP BY key
+    ) summed
+    WHERE total <> 0
+$$;
+"""
+
+# Full rebuild, kept for backfills only; same buckets as the delta path.
+PRODUCT_STOCK_REFRESH = """
+CREATE OR REPLACE FUNCTION product_stock_refresh(p_ids uuid[]) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_ids IS NULL OR cardinality(p_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM product_stock ps
+    WHERE ps.product_id = ANY (p_ids)
+      AND NOT EXISTS (SELECT 1 FROM lote_products lp WHERE lp.product_id = ps.product_id);
+
+    INSERT INTO product_stock AS ps
+        (product_id, total_quantity, lot_count, earliest_expiration, quantity_by_status, updated_at)
+    SELECT t.product_id,
+           t.total_quantity,
+           t.lot_count,
+           t.earliest_expiration,
+           coalesce(s.quantity_by_status, '{}'::jsonb),
+           now()
+    FROM (
+        SELECT product_id,
+               sum(quantity) AS total_quantity,
+               count(DISTINCT lot_id) AS lot_count,
+               min(expiration_date) FILTER (WHERE quantity > 0) AS earliest_expiration
+        FROM lote_products
+        WHERE product_id = ANY (p_ids)
+        GROUP BY product_id
+    ) t
+    LEFT JOIN (
+        SELECT product_id, jsonb_object_agg(status, quantity) AS quantity_by_status
+        FROM (
+            SELECT lp.product_id,
+                   coalesce(a.status::text, 'unassigned') AS status,
+                   sum(lp.quantity) AS quantity
+            FROM lote_products lp
+            LEFT JOIN assignments a ON a.lot_id = lp.lot_id
+            WHERE lp.product_id = ANY (p_ids)
+            GROUP BY 1, 2
+            HAVING sum(lp.quantity) <> 0
+        ) per_status
+        GROUP BY product_id
+    ) s ON s.product_id = t.product_id
+    ON CONFLICT (product_id) DO UPDATE SET
+        total_quantity = excluded.total_quantity,
+        lot_count = excluded.lot_count,
+        earliest_expiration = excluded.earliest_expiration,
+        quantity_by_status = excluded.quantity_by_status,
+        updated_at = excluded.updated_at;
+END
+$$;
+"""
+
+# Folds the rows a statement wrote into the summaries as deltas: new rows add,
+# old rows subtract. (lot_id, product_id) is unique, so lot_count moves by one
+# per row. The upsert locks each summary row in product order, so concurrent
+# writers queue on it instead of overwriting each other; earliest_expiration
+# is only rescanned when a row holding it lost its stock or its date, and that
+# rescan runs after the lock with a fresh snapshot.
+PRODUCT_STOCK_APPLY_ITEMS = """
+CREATE OR REPLACE FUNCTION product_stock_apply_items(p_new lote_products[], p_old lote_products[])
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    WITH changed AS (
+        SELECT n.product_id, n.lot_id, n.quantity::bigint AS quantity, n.expiration_date, 1 AS lots
+        FROM unnest(p_new) n
+        UNION ALL
+        SELECT o.product_id, o.lot_id, -o.quantity::bigint, o.expiration_date, -1
+        FROM unnest(p_old) o
+    )
+    INSERT INTO product_stock AS ps
+        (product_id, total_quantity, lot_count, earliest_expiration, quantity_by_status, updated_at)
+    SELECT t.product_id,
+           t.total_quantity,
+           t.lot_count,
+           t.earliest_expiration,
+           coalesce(s.quantity_by_status, '{}'::jsonb),
+           now()
+    FROM (
+        SELECT product_id,
+               sum(quantity) AS total_quantity,
+               sum(lots) AS lot_count,
+               min(expiration_date) FILTER (WHERE lots > 0 AND quantity > 0) AS earliest_expiration
+        FROM changed
+        GROUP BY product_id
+    ) t
+    LEFT JOIN (
+        SELECT product_id, jsonb_object_agg(status, quantity) AS quantity_by_status
+        FROM (
+            SELECT c.product_id,
+                   coalesce(a.status::text, 'unassigned') AS status,
+                   sum(c.quantity) AS quantity
+            FROM changed c
+            LEFT JOIN assignments a ON a.lot_id = c.lot_id
+            GROUP BY 1, 2
+            HAVING sum(c.quantity) <> 0
+        ) per_status
+        GROUP BY product_id
+    ) s ON s.product_id = t.product_id
+    ORDER BY t.product_id
+    ON CONFLICT (product_id) DO UPDATE SET
+        total_quantity = ps.total_quantity + excluded.total_quantity,
+        lot_count = ps.lot_count + excluded.lot_count,
+        earliest_expiration = least(ps.earliest_expiration, excluded.earliest_expiration),
+        quantity_by_status = product_stock_add_counts(ps.quantity_by_status, excluded.quantity_by_status),
+        updated_at = excluded.updated_at;
+
+    IF cardinality(p_old) = 0 THEN
+        RETURN;
+    END IF;
+
+    UPDATE product_stock ps
+    SET earliest_expiration = (
+        SELECT min(lp.expiration_date) FROM lote_products lp
+        WHERE lp.product_id = ps.product_id AND lp.quantity > 0
+    )
+    WHERE ps.product_id IN (
+        SELECT o.product_id FROM unnest(p_old) o
+        WHERE o.quantity > 0
+          AND o.expiration_date IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM unnest(p_new) n
+              WHERE n.id = o.id
+                AND n.product_id = o.product_id
+                AND n.quantity > 0
+                AND n.expiration_date <= o.expiration_date
+          )
+    )
+      AND ps.earliest_expiration >= (
+        SELECT min(o.expiration_date) FROM unnest(p_old) o
+        WHERE o.product_id = ps.product_id AND o.quantity > 0
+    );
+
+    DELETE FROM product_stock ps
+    WHERE ps.lot_count <= 0
+      AND ps.product_id IN (SELECT o.product_id FROM unnest(p_old) o);
+END
+$$;
+"""
+
+# Assignment writes only move a lot's quantities between status buckets. The
+# per-lot delta of each status is the net count of assignments gained or lost;
+# 'unassigned' moves when a lot goes from no assignments to some or back.
+PRODUCT_STOCK_APPLY_ASSIGNMENTS = """
+CREATE OR REPLACE FUNCTION product_stock_apply_assignments(p_new assignments[], p_old assignments[])
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    WITH changed AS (
+        SELECT n.lot_id, n.status::text AS status, 1 AS delta FROM unnest(p_new) n
+        UNION ALL
+        SELECT o.lot_id, o.status::text, -1 FROM unnest(p_old) o
+    ),
+    lots AS (
+        SELECT c.lot_id,
+               sum(c.delta) AS net,
+               (SELECT count(*) FROM assignments a WHERE a.lot_id = c.lot_id) AS after_count
+        FROM changed c
+        GROUP BY c.lot_id
+    ),
+    lot_deltas AS (
+        SELECT lot_id, status, sum(delta) AS delta FROM changed GROUP BY 1, 2
+        UNION ALL
+        SELECT lot_id, 'unassigned', (after_count = 0)::int - (after_count - net = 0)::int FROM lots
+    ),
+    per_status AS (
+        SELECT lp.product_id, d.status, sum(lp.quantity::bigint * d.delta) AS quantity
+        FROM lot_deltas d
+        JOIN lote_products lp ON lp.lot_id = d.lot_id
+        WHERE d.delta <> 0
+        GROUP BY 1, 2
+        HAVING sum(lp.quantity::bigint * d.delta) <> 0
+    )
+    UPDATE product_stock ps
+    SET quantity_by_status = product_stock_add_counts(ps.quantity_by_status, s.deltas),
+        updated_at = now()
+    FROM (
+        SELECT product_id, jsonb_object_agg(status, quantity) AS deltas
+        FROM per_status
+        GROUP BY product_id
+    ) s
+    WHERE ps.product_id = s.product_id;
+END
+$$;
+"""
+
+LOTE_PRODUCTS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION product_stock_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_apply_items(ARRAY(SELECT n::lote_products FROM new_rows n), '{}');
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_apply_items(ARRAY(SELECT n::lote_products FROM new_rows n), ARRAY(SELECT o::lote_products FROM old_rows o));
+    ELSE
+        PERFORM product_stock_apply_items('{}', ARRAY(SELECT o::lote_products FROM old_rows o));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+ASSIGNMENTS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION product_stock_from_assignments() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_apply_assignments(ARRAY(SELECT n::assignments FROM new_rows n), '{}');
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_apply_assignments(
+            ARRAY(
+                SELECT n::assignments FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.status IS DISTINCT FROM o.status OR n.lot_id IS DISTINCT FROM o.lot_id
+            ),
+            ARRAY(
+                SELECT o::assignments FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE n.status IS DISTINCT FROM o.status OR n.lot_id IS DISTINCT FROM o.lot_id
+            )
+        );
+    ELSE
+        PERFORM product_stock_apply_assignments('{}', ARRAY(SELECT o::assignments FROM old_rows o));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+# Previous trigger bodies (migration 2c7d9e4a1f63): full per-product rebuilds.
+LOTE_PRODUCTS_TRIGGER_FN_REBUILD = """
+CREATE OR REPLACE FUNCTION product_stock_from_lote_products() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT product_id FROM new_rows UNION SELECT product_id FROM old_rows
+        ));
+    ELSE
+        PERFORM product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+ASSIGNMENTS_TRIGGER_FN_REBUILD = """
+CREATE OR REPLACE FUNCTION product_stock_from_assignments() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (SELECT lot_id FROM new_rows)
+        ));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (
+                SELECT unnest(ARRAY[n.lot_id, o.lot_id])
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.status IS DISTINCT FROM o.status OR n.lot_id IS DISTINCT FROM o.lot_id
+            )
+        ));
+    ELSE
+        PERFORM product_stock_refresh(ARRAY(
+            SELECT DISTINCT lp.product_id FROM lote_products lp
+            WHERE lp.lot_id IN (SELECT lot_id FROM old_rows)
+        ));
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(PRODUCT_STOCK_ADD_COUNTS)
+    op.execute(PRODUCT_STOCK_REFRESH)
+    op.execute(PRODUCT_STOCK_APPLY_ITEMS)
+    op.execute(PRODUCT_STOCK_APPLY_ASSIGNMENTS)
+    op.execute(LOTE_PRODUCTS_TRIGGER_FN)
+    op.execute(ASSIGNMENTS_TRIGGER_FN)
+    # Rebase every summary on the zero-free buckets the deltas maintain.
+    op.execute("SELECT product_stock_refresh(ARRAY(SELECT DISTINCT product_id FROM lote_products))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(LOTE_PRODUCTS_TRIGGER_FN_REBUILD)
+    op.execute(ASSIGNMENTS_TRIGGER_FN_REBUILD)
+    op.execute("DROP FUNCTION IF EXISTS product_stock_apply_assignments(assignments[], assignments[])")
+    op.execute("DROP FUNCTION IF EXISTS product_stock_apply_items(lote_products[], lote_products[])")
+    op.execute("DROP FUNCTION IF EXISTS product_stock_add_counts(jsonb, jsonb)")
@@ -0,0 +1,77 @@
+"""lot version on read
+
+Revision ID: d3a7f1c9e582
+Revises: c5e1a8d3f907
+Create Date: 2026-10-17 18:41:09.662104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f1c9e582'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a8d3f907'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LOT_CHILD_TABLES = ('lote_products', 'assignments')
+
+# Body from migration 9d4f2b6e8c31, restored on downgrade.
+TOUCH_LOTES_FN = """
+CREATE OR REPLACE FUNCTION lotes_touch_from_children() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE lotes SET updated_at = now() WHERE id IN (SELECT lot_id FROM new_rows);
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE lotes SET updated_at = now()
+        WHERE id IN (SELECT lot_id FROM new_rows UNION SELECT lot_id FROM old_rows);
+    ELSE
+        UPDATE lotes SET updated_at = now() WHERE id IN (SELECT lot_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Child writes no longer update the parent lotes row; the lot ETag is derived
+    # on read from the (id, version) pairs of its items and assignments.
+    for table in LOT_CHILD_TABLES:
+        for suffix in ('ins', 'upd', 'del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_lot_touch_{suffix} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS lotes_touch_from_children()")
+    op.add_column('assignments', sa.Column('version', sa.BigInteger(), server_default=sa.text('1'), nullable=False))
+    op.execute("""
+        CREATE TRIGGER assignments_version BEFORE UPDATE ON assignments
+        FOR EACH ROW EXECUTE FUNCTION bump_row_version()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS assignments_version ON assignments")
+    op.drop_column('assignments', 'version')
+    op.execute(TOUCH_LOTES_FN)
+    for table in LOT_CHILD_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_ins AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_upd AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_lot_touch_del AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION lotes_touch_from_children()
+        """)
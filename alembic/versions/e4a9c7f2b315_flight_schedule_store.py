@@ -0,0 +1,61 @@
+"""flight schedule store
+
+Revision ID: e4a9c7f2b315
+Revises: b71c4e9a2d05
+Create Date: 2026-10-17 17:12:48.206519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c7f2b315'
+down_revision: Union[str, Sequence[str], None] = 'b71c4e9a2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('flight_schedule_windows',
+    sa.Column('flight_date', sa.Date(), nullable=False),
+    sa.Column('airport_iata', sa.String(length=3), nullable=False),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.Column('flight_count', sa.Integer(), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('flight_date', 'airport_iata', 'direction')
+    )
+    op.create_index('ix_flight_schedule_windows_fetched_at', 'flight_schedule_windows', ['fetched_at'], unique=False)
+    op.create_table('flights',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('flight_date', sa.Date(), nullable=False),
+    sa.Column('airport_iata', sa.String(length=3), nullable=False),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.Column('flight_number', sa.String(length=16), nullable=False),
+    sa.Column('airline_iata', sa.String(length=3), nullable=True),
+    sa.Column('airline_icao', sa.String(length=4), nullable=True),
+    sa.Column('counterpart_iata', sa.String(length=3), nullable=True),
+    sa.Column('scheduled_time', sa.Time(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(
+        'flight_date', 'airport_iata', 'direction', 'flight_number',
+        name='uq_flights_window_flight_number',
+    )
+    )
+    op.create_index('ix_flights_airline_iata_flight_date', 'flights', ['airline_iata', 'flight_date'], unique=False)
+    op.create_index('ix_flights_flight_number_flight_date', 'flights', ['flight_number', 'flight_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_flights_flight_number_flight_date', table_name='flights')
+    op.drop_index('ix_flights_airline_iata_flight_date', table_name='flights')
+    op.drop_table('flights')
+    op.drop_index('ix_flight_schedule_windows_fetched_at', table_name='flight_schedule_windows')
+    op.drop_table('flight_schedule_windows')
@@ -0,0 +1,43 @@
+"""flights window position
+
+Revision ID: f6c2b8d4a719
+Revises: d3a7f1c9e582
+Create Date: 2026-10-17 19:02:44.318275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c2b8d4a719'
+down_revision: Union[str, Sequence[str], None] = 'd3a7f1c9e582'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored rows have no position; windows are re-pulled on the next request.
+    op.execute("DELETE FROM flights")
+    op.execute("DELETE FROM flight_schedule_windows")
+    op.drop_constraint('uq_flights_window_flight_number', 'flights', type_='unique')
+    op.add_column('flights', sa.Column('position', sa.Integer(), nullable=False))
+    op.alter_column('flights', 'flight_number', existing_type=sa.String(length=16), nullable=True)
+    op.create_unique_constraint(
+        'uq_flights_window_position', 'flights', ['flight_date', 'airport_iata', 'direction', 'position'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM flights")
+    op.execute("DELETE FROM flight_schedule_windows")
+    op.drop_constraint('uq_flights_window_position', 'flights', type_='unique')
+    op.alter_column('flights', 'flight_number', existing_type=sa.String(length=16), nullable=False)
+    op.drop_column('flights', 'position')
+    op.create_unique_constraint(
+        'uq_flights_window_flight_number', 'flights', ['flight_date', 'airport_iata', 'direction', 'flight_number'],
+    )
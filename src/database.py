@@ -1,16 +1,98 @@
 # src/db/database.py
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event, text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from src.settings import settings
 
 DATABASE_URL = settings.database_url_async
+READ_DATABASE_URL = settings.database_url_read_async
+
+# Cookie set after a successful write; while it is fresh, reads stay on the primary.
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
+
+def _timeout_settings() -> Dict[str, str]:
+    timeouts = {
+        "statement_timeout": settings.db_statement_timeout_ms,
+        "lock_timeout": settings.db_lock_timeout_ms,
+        "idle_in_transaction_session_timeout": settings.db_idle_in_transaction_timeout_ms,
+    }
+    return {name: str(ms) for name, ms in timeouts.items() if ms is not None}
+
+
+def _set_local_timeouts(conn: Any) -> None:
+    # Detrás de un pooler en modo transacción no hay sesión propia: los timeouts
+    # se fijan por transacción (set_config(..., true) == SET LOCAL).
+    calls = ", ".join(f"set_config('{name}', '{value}', true)" for name, value in _timeout_settings().items())
+    conn.exec_driver_sql(f"SELECT {calls}")
+
+
+def build_engine(
+    url: str, *, pool_size: int, max_overflow: int, pgbouncer: Optional[bool] = None
+) -> AsyncEngine:
+    """
+    Crea un engine async. En modo PgBouncer (transaction pooling) el pool vive en
+    PgBouncer: NullPool en la app, sin caché de sentencias y con nombres únicos
+    para los prepared statements, que así no chocan entre backends compartidos.
+    """
+    pgbouncer = settings.db_pgbouncer_mode if pgbouncer is None else pgbouncer
+    if pgbouncer:
+        new_engine = create_async_engine(
+            url,
+            poolclass=NullPool,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            },
+            echo=False,
+        )
+        if _timeout_settings():
+            event.listen(new_engine.sync_engine, "begin", _set_local_timeouts)
+        return new_engine
+
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    }
+    if _timeout_settings():
+        # Conexión directa: los timeouts van en el arranque de la sesión, sin coste por transacción.
+        connect_args["server_settings"] = _timeout_settings()
+    return create_async_engine(
+        url,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+        echo=False,
+    )
+
 
 # Engine async
-engine = create_async_engine(
+engine = build_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False, 
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
+
+# Engine de solo lectura (réplica); sin réplica configurada, es el mismo primario.
+read_engine: AsyncEngine = (
+    build_engine(
+        READ_DATABASE_URL,
+        pool_size=settings.db_read_pool_size,
+        max_overflow=settings.db_read_max_overflow,
+    )
+    if READ_DATABASE_URL
+    else engine
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -19,10 +101,61 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 class Base(DeclarativeBase):
     pass
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+
+class ReplicaLagMonitor:
+    """
+    Mide el retraso de la réplica como mucho una vez cada `check_every` segundos.
+    Un error al medir cuenta como réplica no disponible.
+    """
+
+    _LAG_SQL = text(
+        """
+        SELECT CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+        """
+    )
+
+    def __init__(self, max_lag: float, check_every: float):
+        self.max_lag = max_lag
+        self.check_every = check_every
+        self.lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def healthy(self) -> bool:
+        if time.monotonic() - self._checked_at >= self.check_every:
+            async with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_every:
+                    try:
+                        async with read_engine.connect() as conn:
+                            self.lag = float((await conn.execute(self._LAG_SQL)).scalar() or 0.0)
+                    except Exception:
+                        self.lag = None
+                    self._checked_at = time.monotonic()
+        return self.lag is not None and self.lag <= self.max_lag
+
+
+replica_monitor = ReplicaLagMonitor(
+    max_lag=settings.db_replica_max_lag_seconds,
+    check_every=settings.db_replica_lag_check_seconds,
+)
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # Solo los endpoints de escritura piden el primario: la cookie de
+    # read-your-writes se fija únicamente para ellos (ver src.middleware).
+    request.state.primary_write = True
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -30,3 +163,36 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
 
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_sessionmaker(request: Request) -> async_sessionmaker:
+    """
+    Fábrica de sesiones de lectura de la petición: la réplica salvo que el
+    cliente haya escrito hace poco (read-your-writes) o la réplica vaya
+    retrasada. Los streams, que abren su sesión después de que el endpoint
+    devuelva, la reciben directamente.
+    """
+    use_primary = (
+        read_engine is engine
+        or _wrote_recently(request)
+        or not await replica_monitor.healthy()
+    )
+    return AsyncSessionLocal if use_primary else AsyncReadSessionLocal
+
+
+async def get_read_db(
+    sessions: async_sessionmaker = Depends(get_read_sessionmaker),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Sesión para endpoints de lectura (ver `get_read_sessionmaker`)."""
+    async with sessions() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
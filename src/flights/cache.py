@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.settings import settings
+
+from .protection import UpstreamUnavailable
+from .store import load_schedule
+from .upstream import Schedule, ScheduleFetcher, ScheduleKey
+
+logger = logging.getLogger(__name__)
+
+
+class FlightScheduleCache:
+    """
+    Bounded in-process cache of Aviation Edge schedules, in front of the
+    flights store (see store.load_schedule).
+
+    Entries are fresh for `ttl` seconds and may be served stale for another
+    `stale_ttl` seconds while a single background refresh runs. Concurrent
+    misses on the same key share one load. Failed calls are never
+    cached; while the upstream is unavailable (breaker open, limiter full) an
+    expired entry still in memory is served instead of the error. Cached
+    lists are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, fetch: ScheduleFetcher, max_size: int = 1000, ttl: float = 300.0, stale_ttl: float = 900.0):
+        self.fetch = fetch
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[ScheduleKey, Tuple[float, Schedule]]" = OrderedDict()
+        self._inflight: Dict[ScheduleKey, asyncio.Task] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    def peek(self, key: ScheduleKey) -> Optional[Tuple[float, Schedule]]:
+        """(age in seconds, schedule) of a cached entry, fresh or not; no metrics, no refresh."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fetched_at, schedule = entry
+        return time.monotonic() - fetched_at, schedule
+
+    def put(self, key: ScheduleKey, schedule: Schedule) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic(), schedule)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(self, key: ScheduleKey, timeout: Optional[float]) -> Schedule:
+        try:
+            schedule = await self.fetch(key, timeout)
+            self.put(key, schedule)
+            return schedule
+        finally:
+            self._inflight.pop(key, None)
+
+    def _start_load(self, key: ScheduleKey, timeout: Optional[float]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, timeout), name=f"flight-schedule-{key.iataCode}")
+            self._inflight[key] = task
+        return task
+
+    def _refresh(self, key: ScheduleKey) -> None:
+        if key in self._inflight:
+            return
+        task = self._start_load(key, None)
+        self.refreshes += 1
+        self._refreshing.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+            logger.warning("Background flight schedule refresh failed: %s", task.exception())
+
+    async def get(self, key: ScheduleKey, timeout: Optional[float] = None) -> Schedule:
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, schedule = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return schedule
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._refresh(key)
+                return schedule
+        self.misses += 1
+        if key in self._inflight:
+            self.coalesced += 1
+        try:
+            # Shielded so one caller giving up does not cancel the call for the rest.
+            return await asyncio.shield(self._start_load(key, timeout))
+        except UpstreamUnavailable:
+            if entry is None:
+                raise
+            self.fallbacks += 1
+            return entry[1]
+
+    def invalidate(self, key: ScheduleKey) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def stop(self) -> None:
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+        self._refreshing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": ((self.hits + self.stale_hits) / lookups) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "fallbacks": self.fallbacks,
+        }
+
+
+flight_schedules = FlightScheduleCache(
+    fetch=load_schedule,
+    max_size=settings.flights_cache_max_size,
+    ttl=settings.flights_cache_ttl_seconds,
+    stale_ttl=settings.flights_cache_stale_seconds,
+)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+
+from .cache import flight_schedules
+from .records import flight_number
+from .store import unstored_keys
+from .upstream import Schedule, ScheduleKey
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_Outcome = Tuple[ScheduleKey, Optional[Schedule], Optional[str]]
+
+
+def flight_key(day: date, flight: Dict[str, Any]) -> Optional[Tuple[date, str]]:
+    """Dedup key of an Aviation Edge record: the flight number on its date."""
+    number = flight_number(flight)
+    return (day, number) if number else None
+
+
+def _line(event: str, key: Optional[ScheduleKey] = None, **fields: Any) -> bytes:
+    if key is not None:
+        fields = {"date": key.date, "iataCode": key.iataCode, "type": key.type, **fields}
+    return orjson.dumps({"event": event, **fields}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def upstream_keys(keys: Iterable[ScheduleKey]) -> List[ScheduleKey]:
+    """Keys neither the cache (fresh or stale) nor the store can answer."""
+    servable = flight_schedules.ttl + flight_schedules.stale_ttl
+    uncached = []
+    for key in dict.fromkeys(keys):
+        entry = flight_schedules.peek(key)
+        if entry is None or entry[0] >= servable:
+            uncached.append(key)
+    return await unstored_keys(uncached)
+
+
+async def _fetch(key: ScheduleKey, semaphore: asyncio.Semaphore, timeout: float) -> _Outcome:
+    async with semaphore:
+        try:
+            schedule = await asyncio.wait_for(flight_schedules.get(key, timeout), timeout)
+        except asyncio.TimeoutError:
+            return key, None, "timeout"
+        except (ValueError, RuntimeError) as exc:
+            return key, None, str(exc)
+    return key, schedule, None
+
+
+async def iter_fanout(keys: Iterable[ScheduleKey], *, concurrency: int, timeout: float) -> AsyncIterator[bytes]:
+    """
+    Fetches every key through the schedule cache, at most `concurrency` at a
+    time, and yields NDJSON as each call completes: one "flight" line per new
+    flight number and date, one "error" line per failed call and a final
+    "done" line with the totals. When the client goes away only this request's
+    waits are cancelled: the loads behind them are shielded in the cache (other
+    callers may share them) and run to completion, filling the cache.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(_fetch(key, semaphore, timeout)) for key in keys]
+    seen: Set[Tuple[date, str]] = set()
+    flights = duplicates = failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, schedule, error = await next_done
+            if error is not None:
+                failed += 1
+                yield _line("error", key, detail=error)
+                continue
+            lines: List[bytes] = []
+            for flight in schedule:
+                dedup = flight_key(key.date, flight)
+                if dedup is not None:
+                    if dedup in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(dedup)
+                lines.append(_line("flight", key, flight=flight))
+            flights += len(lines)
+            if lines:
+                yield b"".join(lines)
+        yield _line("done", calls=len(tasks), failed=failed, flights=flights, duplicates=duplicates)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import BigInteger, Date, Index, Integer, String, Time, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class FlightScheduleWindow(Base):
+    """
+    One complete (unfiltered) Aviation Edge pull of an airport, date and
+    direction. `fetched_at` is what freshness and the refresher go by; a
+    window with no flights is still a valid, fresh answer.
+    """
+    __tablename__ = "flight_schedule_windows"
+    __table_args__ = (
+        Index("ix_flight_schedule_windows_fetched_at", "fetched_at"),
+    )
+
+    flight_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    airport_iata: Mapped[str] = mapped_column(String(3), primary_key=True)
+    direction: Mapped[str] = mapped_column(String(10), primary_key=True)
+    flight_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+
+class Flight(Base):
+    """
+    Scheduled flight as seen from `airport_iata` (its origin for departures,
+    its destination for arrivals). `payload` keeps the upstream record as is
+    and `position` its place in the window's answer, so every record is kept
+    in upstream order, with or without a (unique) flight number.
+    """
+    __tablename__ = "flights"
+    __table_args__ = (
+        UniqueConstraint(
+            "flight_date", "airport_iata", "direction", "position",
+            name="uq_flights_window_position",
+        ),
+        Index("ix_flights_airline_iata_flight_date", "airline_iata", "flight_date"),
+        Index("ix_flights_flight_number_flight_date", "flight_number", "flight_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    flight_date: Mapped[date] = mapped_column(Date, nullable=False)
+    airport_iata: Mapped[str] = mapped_column(String(3), nullable=False)
+    direction: Mapped[str] = mapped_column(String(10), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    flight_number: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    airline_iata: Mapped[Optional[str]] = mapped_column(String(3), nullable=True)
+    airline_icao: Mapped[Optional[str]] = mapped_column(String(4), nullable=True)
+    counterpart_iata: Mapped[Optional[str]] = mapped_column(String(3), nullable=True)
+    scheduled_time: Mapped[Optional[time]] = mapped_column(Time, nullable=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .records import parse_time
+
+MAX_PROJECTION_FIELDS = 50
+
+FieldPath = Tuple[str, ...]
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[FieldPath, ...]:
+    """`"flight.iataNumber,departure"` -> (("flight", "iataNumber"), ("departure",))."""
+    if not fields:
+        return ()
+    paths: List[FieldPath] = []
+    for raw in fields.split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        path = tuple(raw.split("."))
+        if not all(path):
+            raise ValueError(f"Campo inválido en fields: '{raw}'.")
+        if path not in paths:
+            paths.append(path)
+    if len(paths) > MAX_PROJECTION_FIELDS:
+        raise ValueError(f"fields admite como máximo {MAX_PROJECTION_FIELDS} campos.")
+    return tuple(paths)
+
+
+def _copy_path(source: Dict[str, Any], target: Dict[str, Any], path: FieldPath) -> None:
+    head, rest = path[0], path[1:]
+    if head not in source:
+        return
+    value = source[head]
+    if not rest:
+        target[head] = value
+    elif isinstance(value, dict):
+        child = target.setdefault(head, {})
+        if isinstance(child, dict):
+            _copy_path(value, child, rest)
+
+
+@dataclass(frozen=True)
+class FlightProjection:
+    """
+    Server-side filters and field projection over Aviation Edge records.
+
+    Terminal and time window apply to the queried side of the flight
+    (departure.* for departures, arrival.* for arrivals); a window whose start
+    is after its end wraps past midnight. Future schedules carry no status
+    and count as "scheduled".
+    """
+
+    side: str = "departure"
+    fields: Tuple[FieldPath, ...] = ()
+    status: Optional[str] = None
+    terminal: Optional[str] = None
+    time_from: Optional[time] = None
+    time_to: Optional[time] = None
+
+    @classmethod
+    def build(
+        cls,
+        side: str,
+        fields: Optional[str] = None,
+        status: Optional[str] = None,
+        terminal: Optional[str] = None,
+        time_from: Optional[time] = None,
+        time_to: Optional[time] = None,
+    ) -> "FlightProjection":
+        return cls(
+            side=side,
+            fields=parse_fields(fields),
+            status=status.strip().lower() if status else None,
+            terminal=terminal.strip().upper() if terminal else None,
+            time_from=time_from,
+            time_to=time_to,
+        )
+
+    @property
+    def filters(self) -> bool:
+        return any(value is not None for value in (self.status, self.terminal, self.time_from, self.time_to))
+
+    @property
+    def is_identity(self) -> bool:
+        return not self.fields and not self.filters
+
+    def _in_window(self, value: Optional[time]) -> bool:
+        if self.time_from is None and self.time_to is None:
+            return True
+        if value is None:
+            return False
+        if self.time_from is not None and self.time_to is not None and self.time_from > self.time_to:
+            return value >= self.time_from or value <= self.time_to
+        return (self.time_from is None or value >= self.time_from) and (self.time_to is None or value <= self.time_to)
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        if self.status is not None and str(record.get("status") or "scheduled").lower() != self.status:
+            return False
+        side = record.get(self.side) or {}
+        if self.terminal is not None and str(side.get("terminal") or "").upper() != self.terminal:
+            return False
+        return self._in_window(parse_time(side.get("scheduledTime")))
+
+    def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.fields:
+            return record
+        projected: Dict[str, Any] = {}
+        for path in self.fields:
+            _copy_path(record, projected, path)
+        return projected
+
+    def apply(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.is_identity:
+            return records if isinstance(records, list) else list(records)
+        if not self.filters:
+            return [self.project(record) for record in records]
+        return [self.project(record) for record in records if self.matches(record)]
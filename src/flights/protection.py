@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_LATENCY_BUCKETS_MS: Tuple[float, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 15000)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Raised without calling the upstream: the breaker is open or the limiter queue is full."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float):
+        super().__init__(f"{upstream} no disponible ({reason}); reintenta en {math.ceil(retry_after)} s.")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter: `rate` tokens per second, up to `burst` saved.
+    Callers queue by reserving a future token; a caller that would wait longer
+    than `max_wait` is turned away instead.
+    """
+
+    def __init__(self, rate: float, burst: int, max_wait: float):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self.granted = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(float(self.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> Optional[float]:
+        """Seconds to wait for the reserved token, or None when that exceeds max_wait."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        wait = max(0.0, (1.0 - self.tokens) / self.rate)
+        if wait > self.max_wait:
+            self.rejected += 1
+            return None
+        # May go negative: the deficit is the queue of callers already waiting.
+        self.tokens -= 1.0
+        self.granted += 1
+        self.waited_seconds += wait
+        return wait
+
+    def admits(self, within: float) -> Optional[int]:
+        """
+        How many reservations made now would be granted with a wait of at most
+        `within` seconds (and max_wait); None when the bucket is disabled.
+        """
+        if self.rate <= 0:
+            return None
+        self._refill()
+        return max(0, math.floor(self.tokens + min(within, self.max_wait) * self.rate))
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 3),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast for
+    `reset_timeout` seconds; then lets a single probe through (half-open),
+    closing again if it succeeds and reopening if it does not.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened = 0
+        self.short_circuited = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_after() == 0.0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def release(self) -> None:
+        """Gives back the half-open probe slot when the call never reached the upstream."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_timeout,
+            "retry_after_seconds": round(self.retry_after(), 3) if self.state == self.OPEN else 0.0,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class LatencyHistogram:
+    """Non-cumulative latency histogram: one count per bucket upper bound (ms) plus +Inf."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.count += 1
+        self.sum_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        bounds = [str(bound) for bound in self.buckets_ms] + ["+Inf"]
+        return {
+            "buckets_ms": dict(zip(bounds, self.counts)),
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+        }
+
+
+class UpstreamGuard:
+    """
+    Limiter, breaker and latency histograms around the calls to one upstream.
+    Only exceptions of `failure_types` count against the breaker; anything
+    else (e.g. bad input) is the caller's problem, not the upstream's.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: TokenBucket,
+        breaker: CircuitBreaker,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.failure_types = failure_types
+        self.latency = {"ok": LatencyHistogram(), "error": LatencyHistogram()}
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(self.name, "circuito abierto", self.breaker.retry_after())
+        wait = self.limiter.reserve()
+        if wait is None:
+            self.breaker.release()
+            raise UpstreamUnavailable(self.name, "límite de peticiones", self.limiter.max_wait)
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                # Cancelled while queued: give back the token and the probe slot.
+                self.limiter.tokens += 1.0
+                self.breaker.release()
+                raise
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except self.failure_types:
+            self.latency["error"].observe((time.perf_counter() - started) * 1000)
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.latency["ok"].observe((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limiter": self.limiter.stats(),
+            "breaker": self.breaker.stats(),
+            "latency": {outcome: histogram.stats() for outcome, histogram in self.latency.items()},
+        }
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import time
+from typing import Any, Dict, Optional
+
+
+def flight_number(record: Dict[str, Any]) -> Optional[str]:
+    """Upper-cased IATA (else ICAO, else bare) number of an Aviation Edge record."""
+    flight = record.get("flight") or {}
+    value = flight.get("iataNumber") or flight.get("icaoNumber") or flight.get("number")
+    return str(value).upper() if value else None
+
+
+def upper_code(value: Any, length: int) -> Optional[str]:
+    if not value:
+        return None
+    code = str(value).upper().strip()
+    return code if len(code) <= length else None
+
+
+def parse_time(value: Any) -> Optional[time]:
+    """Upstream scheduledTime is "HH:MM"; anything else is treated as unknown."""
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return time(int(hours), int(minutes))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.database import AsyncSessionLocal
+from src.settings import settings
+
+from .cache import flight_schedules
+from .store import store_schedule
+from .upstream import ScheduleKey, fetch_upstream
+
+logger = logging.getLogger(__name__)
+
+# Claims the stalest future windows by stamping them as fetched now, so other
+# workers skip them; `previous` is kept to hand a window back if its refresh fails.
+_CLAIM_STALE_WINDOWS = text(
+    """
+    UPDATE flight_schedule_windows w SET fetched_at = now()
+    FROM (
+        SELECT flight_date, airport_iata, direction, fetched_at AS previous
+        FROM flight_schedule_windows
+        WHERE fetched_at < now() - make_interval(secs => :refresh_age)
+          AND flight_date > current_date
+        ORDER BY fetched_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ) stale
+    WHERE w.flight_date = stale.flight_date
+      AND w.airport_iata = stale.airport_iata
+      AND w.direction = stale.direction
+    RETURNING w.flight_date, w.airport_iata, w.direction, stale.previous
+    """
+)
+
+_RELEASE_WINDOW = text(
+    """
+    UPDATE flight_schedule_windows SET fetched_at = :previous
+    WHERE flight_date = :flight_date AND airport_iata = :airport_iata AND direction = :direction
+    """
+)
+
+
+class FlightStoreRefresher:
+    """
+    Background task that re-pulls, one at a time, the stored windows whose
+    data is older than `refresh_age` seconds. Only windows somebody asked for
+    are ever stored, so only those are kept warm.
+    """
+
+    def __init__(self, interval: float, refresh_age: float, batch_size: int):
+        self.interval = interval
+        self.refresh_age = refresh_age
+        self.batch_size = batch_size
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _claim(self) -> List[Tuple]:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                _CLAIM_STALE_WINDOWS, {"refresh_age": self.refresh_age, "batch_size": self.batch_size},
+            )).all()
+            await db.commit()
+        return rows
+
+    async def _release(self, row: Tuple, key: ScheduleKey) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(_RELEASE_WINDOW, dict(row._mapping))
+                await db.commit()
+        except SQLAlchemyError:
+            logger.exception("Could not release flight window %s", key)
+
+    async def run_once(self) -> int:
+        refreshed = 0
+        for row in await self._claim():
+            key = ScheduleKey(row.flight_date, row.airport_iata, row.direction)
+            try:
+                schedule = await fetch_upstream(key)
+            except (RuntimeError, ValueError) as exc:
+                logger.warning("Flight window refresh failed for %s: %s", key, exc)
+                await self._release(row, key)
+                continue
+            flight_schedules.put(key, schedule)
+            if not await store_schedule(key, schedule):
+                # The claim stamped the window fresh; hand it back so it is retried.
+                await self._release(row, key)
+                continue
+            refreshed += 1
+        self.last_run = datetime.utcnow()
+        return refreshed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                refreshed = await self.run_once()
+                if refreshed:
+                    logger.info("Refreshed %d flight schedule windows", refreshed)
+            except Exception:
+                logger.exception("Flight store refresh failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0 and settings.flights_store_enabled:
+            self._task = asyncio.create_task(self._run(), name="flight-store-refresher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+flight_store_refresher = FlightStoreRefresher(
+    interval=settings.flights_store_refresh_interval_seconds,
+    refresh_age=settings.flights_store_refresh_age_seconds,
+    batch_size=settings.flights_store_refresh_batch_size,
+)
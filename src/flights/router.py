@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import math
+from datetime import date as _date, datetime, time
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from src.settings import settings
+
+from .cache import flight_schedules
+from .fanout import NDJSON_MEDIA_TYPE, iter_fanout, upstream_keys
+from .projection import FlightProjection
+from .protection import UpstreamUnavailable
+from .schemas import FlightFanoutRequest
+from .upstream import UPSTREAMS, ScheduleKey, aviation_edge
+
+flights_router = APIRouter(prefix="/api/flights", tags=["flights"], default_response_class=ORJSONResponse)
+
+
+def _validate_query(date: _date, iataCode: str) -> None:
+    today = datetime.utcnow().date()
+    if date <= today:
+        raise HTTPException(status_code=400, detail="La fecha debe ser futura (mañana en adelante).")
+
+    if len(iataCode) != 3 or not iataCode.isalpha():
+        raise HTTPException(status_code=400, detail="iataCode inválido; usa solo letras (p. ej., 'BER').")
+
+
+@flights_router.get("/future", response_model=List[Dict[str, Any]])
+async def get_future_flights(
+    date: _date = Query(..., description="Fecha futura en formato YYYY-MM-DD."),
+    iataCode: str = Query(..., min_length=3, max_length=3, description="Código IATA del aeropuerto (ej. BER)"),
+    type: Literal["departure", "arrival"] = Query("departure", description="Tipo de horario a consultar"),
+    airline_iata: Optional[str] = Query(None, description="Filtro por IATA de aerolínea (ej. LH)"),
+    airline_icao: Optional[str] = Query(None, description="Filtro por ICAO de aerolínea (ej. DLH)"),
+    flight_num: Optional[str] = Query(None, description="Número de vuelo sin prefijo de aerolínea (ej. 6258)"),
+    fields: Optional[str] = Query(
+        None, description="Campos a devolver, separados por comas; admite rutas (ej. flight.iataNumber,departure)",
+    ),
+    status: Optional[str] = Query(None, description="Filtro por estado del vuelo (ej. scheduled)"),
+    terminal: Optional[str] = Query(None, description="Filtro por terminal del aeropuerto consultado"),
+    time_from: Optional[time] = Query(None, description="Hora programada mínima (HH:MM) en el aeropuerto consultado"),
+    time_to: Optional[time] = Query(None, description="Hora programada máxima (HH:MM); si es menor que time_from cruza medianoche"),
+) -> List[Dict[str, Any]]:
+    """
+    Proxy al endpoint flightsFuture de Aviation Edge con validaciones básicas,
+    filtros y proyección de campos del lado del servidor.
+    """
+    _validate_query(date, iataCode)
+
+    try:
+        projection = FlightProjection.build(type, fields, status, terminal, time_from, time_to)
+        data = await flight_schedules.get(
+            ScheduleKey.build(date, iataCode, type, airline_iata, airline_icao, flight_num)
+        )
+        # Respuesta directa: evita re-validar miles de dicts contra response_model.
+        return ORJSONResponse(projection.apply(data))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve)) from ve
+    except UpstreamUnavailable as ue:
+        raise HTTPException(
+            status_code=503, detail=str(ue), headers={"Retry-After": str(math.ceil(ue.retry_after))},
+        ) from ue
+    except RuntimeError as re:
+        raise HTTPException(status_code=502, detail=str(re)) from re
+
+
+@flights_router.post("/future/batch")
+async def get_future_flights_batch(body: FlightFanoutRequest) -> StreamingResponse:
+    """
+    Consulta todas las combinaciones aeropuerto × fecha × tipo en paralelo
+    (acotado) y devuelve NDJSON conforme llegan, sin vuelos repetidos.
+    """
+    airports = list(dict.fromkeys(code.upper().strip() for code in body.airports))
+    dates = list(dict.fromkeys(body.dates))
+    types = list(dict.fromkeys(body.types))
+    for day in dates:
+        for code in airports:
+            _validate_query(day, code)
+
+    calls = len(airports) * len(dates) * len(types)
+    if calls > settings.flights_fanout_max_calls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Demasiadas consultas ({calls}); el máximo es {settings.flights_fanout_max_calls}.",
+        )
+
+    keys = [
+        ScheduleKey.build(day, code, type, body.airline_iata, body.airline_icao)
+        for day in dates
+        for code in airports
+        for type in types
+    ]
+    timeout = body.timeout or settings.flights_fanout_timeout_seconds
+    # Se rechaza de entrada el lote que el limitador no podría atender dentro del
+    # timeout, en vez de dejar que las últimas consultas fallen una a una.
+    admitted = aviation_edge.limiter.admits(timeout)
+    if admitted is not None:
+        needed = len(await upstream_keys(keys))
+        if needed > admitted:
+            retry_after = (needed - admitted) / aviation_edge.limiter.rate
+            raise HTTPException(
+                status_code=429,
+                detail=(
+                    f"El lote necesita {needed} consultas a Aviation Edge y el límite de peticiones "
+                    f"admite {admitted} en {math.ceil(timeout)} s; divídelo o reintenta más tarde."
+                ),
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return StreamingResponse(
+        iter_fanout(
+            keys,
+            concurrency=settings.flights_fanout_concurrency,
+            timeout=timeout,
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@flights_router.get("/cache/stats")
+async def flight_cache_stats():
+    return flight_schedules.stats()
+
+
+@flights_router.get("/upstream/stats")
+async def flight_upstream_stats():
+    return {name: guard.stats() for name, guard in UPSTREAMS.items()}
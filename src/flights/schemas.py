@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+FlightType = Literal["departure", "arrival"]
+
+MAX_FANOUT_AIRPORTS = 50
+MAX_FANOUT_DATES = 31
+
+
+class FlightFanoutRequest(BaseModel):
+    airports: List[str] = Field(..., min_length=1, max_length=MAX_FANOUT_AIRPORTS)
+    dates: List[date] = Field(..., min_length=1, max_length=MAX_FANOUT_DATES)
+    types: List[FlightType] = Field(default_factory=lambda: ["departure"], min_length=1, max_length=2)
+    airline_iata: Optional[str] = None
+    airline_icao: Optional[str] = None
+    timeout: Optional[float] = Field(None, gt=0, le=60, description="Per-call timeout in seconds")
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import AsyncReadSessionLocal, AsyncSessionLocal
+from src.settings import settings
+
+from .models import Flight, FlightScheduleWindow
+from .protection import UpstreamUnavailable
+from .records import upper_code, flight_number, parse_time
+from .upstream import Schedule, ScheduleKey, fetch_upstream
+
+logger = logging.getLogger(__name__)
+
+
+def _flight_row(key: ScheduleKey, position: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    number = flight_number(record)
+    here, there = ("departure", "arrival") if key.type == "departure" else ("arrival", "departure")
+    airline = record.get("airline") or {}
+    return {
+        "flight_date": key.date,
+        "airport_iata": key.iataCode,
+        "direction": key.type,
+        "position": position,
+        "flight_number": number if number is not None and len(number) <= 16 else None,
+        "airline_iata": upper_code(airline.get("iataCode"), 3),
+        "airline_icao": upper_code(airline.get("icaoCode"), 4),
+        "counterpart_iata": upper_code((record.get(there) or {}).get("iataCode"), 3),
+        "scheduled_time": parse_time((record.get(here) or {}).get("scheduledTime")),
+        "payload": record,
+    }
+
+
+def _window_filter(model: Any, key: ScheduleKey) -> List[Any]:
+    return [model.flight_date == key.date, model.airport_iata == key.iataCode, model.direction == key.type]
+
+
+async def read_schedule(db: AsyncSession, key: ScheduleKey, max_age: Optional[float]) -> Optional[Schedule]:
+    """
+    Stored flights for `key` when its whole window was pulled less than
+    `max_age` seconds ago (at any time when None), else None. Airline and
+    flight number filters are answered from the stored window, so they need
+    no upstream call either.
+    """
+    window = select(FlightScheduleWindow.fetched_at).where(*_window_filter(FlightScheduleWindow, key))
+    if max_age is not None:
+        window = window.where(FlightScheduleWindow.fetched_at > func.now() - timedelta(seconds=max_age))
+    if (await db.execute(window)).first() is None:
+        return None
+    stmt = (
+        select(Flight.payload)
+        .where(*_window_filter(Flight, key))
+        .order_by(Flight.position)
+    )
+    if key.airline_iata:
+        stmt = stmt.where(Flight.airline_iata == key.airline_iata)
+    if key.airline_icao:
+        stmt = stmt.where(Flight.airline_icao == key.airline_icao)
+    if key.flight_num:
+        stmt = stmt.where(func.jsonb_extract_path_text(Flight.payload, "flight", "number") == key.flight_num)
+    return list((await db.execute(stmt)).scalars())
+
+
+async def save_schedule(db: AsyncSession, key: ScheduleKey, schedule: Schedule) -> int:
+    """
+    Replaces the stored flights of a whole-window answer with every record in
+    it, in upstream order (records without a flight number and repeated
+    numbers included), and stamps the window as fresh. Filtered answers are
+    not stored: read_schedule answers them from their window.
+    """
+    if not key.is_window:
+        return 0
+    window = insert(FlightScheduleWindow).values(
+        flight_date=key.date, airport_iata=key.iataCode, direction=key.type, flight_count=len(schedule),
+    )
+    # Upserting the window first locks it, so concurrent saves of one window queue up.
+    await db.execute(
+        window.on_conflict_do_update(
+            index_elements=["flight_date", "airport_iata", "direction"],
+            set_={"flight_count": window.excluded.flight_count, "fetched_at": func.now()},
+        )
+    )
+    await db.execute(delete(Flight).where(*_window_filter(Flight, key)))
+    if schedule:
+        await db.execute(
+            insert(Flight), [_flight_row(key, position, record) for position, record in enumerate(schedule)]
+        )
+    await db.commit()
+    return len(schedule)
+
+
+async def store_schedule(key: ScheduleKey, schedule: Schedule) -> bool:
+    """Persists an upstream answer; False when the store write failed."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await save_schedule(db, key, schedule)
+    except SQLAlchemyError:
+        # The answer is still good; it just is not persisted this time.
+        logger.exception("Could not store flight schedule for %s", key)
+        return False
+    return True
+
+
+async def _read_stored(key: ScheduleKey, max_age: Optional[float]) -> Optional[Schedule]:
+    if not settings.flights_store_enabled:
+        return None
+    try:
+        async with AsyncReadSessionLocal() as db:
+            return await read_schedule(db, key, max_age)
+    except SQLAlchemyError:
+        logger.exception("Flight store read failed for %s", key)
+        return None
+
+
+async def unstored_keys(keys: Sequence[ScheduleKey]) -> List[ScheduleKey]:
+    """Keys whose window is not fresh in the store, i.e. that load_schedule would fetch upstream."""
+    if not keys or not settings.flights_store_enabled:
+        return list(keys)
+    window = (FlightScheduleWindow.flight_date, FlightScheduleWindow.airport_iata, FlightScheduleWindow.direction)
+    stmt = select(*window).where(
+        tuple_(*window).in_([(key.date, key.iataCode, key.type) for key in keys]),
+        FlightScheduleWindow.fetched_at > func.now() - timedelta(seconds=settings.flights_store_max_age_seconds),
+    )
+    try:
+        async with AsyncReadSessionLocal() as db:
+            fresh = {tuple(row) for row in await db.execute(stmt)}
+    except SQLAlchemyError:
+        logger.exception("Flight store read failed for %d windows", len(keys))
+        return list(keys)
+    return [key for key in keys if (key.date, key.iataCode, key.type) not in fresh]
+
+
+async def load_schedule(key: ScheduleKey, timeout: Optional[float] = None) -> Schedule:
+    """
+    Fetcher behind the schedule cache: the store when fresh, else upstream
+    (then stored). While the upstream is unavailable a stale stored window
+    beats an error.
+    """
+    stored = await _read_stored(key, settings.flights_store_max_age_seconds)
+    if stored is not None:
+        return stored
+    try:
+        schedule = await fetch_upstream(key, timeout)
+    except UpstreamUnavailable:
+        stored = await _read_stored(key, None)
+        if stored is None:
+            raise
+        return stored
+    if settings.flights_store_enabled and key.is_window:
+        await store_schedule(key, schedule)
+    return schedule
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from src.settings import settings
+from src.utils import GetFlightsData, UpstreamNetworkError
+
+from .protection import CircuitBreaker, TokenBucket, UpstreamGuard
+
+Schedule = List[Dict[str, Any]]
+
+
+class ScheduleKey(NamedTuple):
+    date: datetime.date
+    iataCode: str
+    type: str
+    airline_iata: Optional[str] = None
+    airline_icao: Optional[str] = None
+    flight_num: Optional[str] = None
+
+    @classmethod
+    def build(
+        cls,
+        date: datetime.date,
+        iataCode: str,
+        type: str = "departure",
+        airline_iata: Optional[str] = None,
+        airline_icao: Optional[str] = None,
+        flight_num: Optional[str] = None,
+    ) -> "ScheduleKey":
+        # Same normalisation GetFlightsData applies to the query string, so
+        # "ber" and "BER " share an entry.
+        return cls(
+            date,
+            iataCode.upper().strip(),
+            type,
+            airline_iata.upper().strip() if airline_iata else None,
+            airline_icao.upper().strip() if airline_icao else None,
+            str(flight_num).strip() if flight_num else None,
+        )
+
+    @property
+    def is_window(self) -> bool:
+        """True when the key asks for the whole airport/date/direction, unfiltered."""
+        return not (self.airline_iata or self.airline_icao or self.flight_num)
+
+
+ScheduleFetcher = Callable[[ScheduleKey, Optional[float]], Awaitable[Schedule]]
+
+
+aviation_edge = UpstreamGuard(
+    "aviation_edge",
+    limiter=TokenBucket(
+        rate=settings.flights_upstream_rate_per_minute / 60.0,
+        burst=settings.flights_upstream_burst,
+        max_wait=settings.flights_upstream_max_wait_seconds,
+    ),
+    breaker=CircuitBreaker(
+        failure_threshold=settings.flights_breaker_failure_threshold,
+        reset_timeout=settings.flights_breaker_reset_seconds,
+    ),
+    failure_types=(UpstreamNetworkError,),
+)
+
+UPSTREAMS: Dict[str, UpstreamGuard] = {aviation_edge.name: aviation_edge}
+
+
+async def fetch_upstream(key: ScheduleKey, timeout: Optional[float] = None) -> Schedule:
+    return await aviation_edge.call(
+        GetFlightsData.aget_data,
+        date=key.date,
+        iataCode=key.iataCode,
+        type=key.type,
+        airline_iata=key.airline_iata,
+        airline_icao=key.airline_icao,
+        flight_num=key.flight_num,
+        timeout=timeout,
+    )
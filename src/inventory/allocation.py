@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import heapq
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, and_, exists, or_, select
+from sqlalchemy.orm import aliased
+
+from .models import Assignment, AssignmentStatus, Lote, LoteProduct, Product
+from .schemas import AllocatedLot, FlightAllocation, FlightDemand
+
+# Items without an expiration date never expire, so they go last.
+_NO_EXPIRY = date.max
+
+
+@dataclass
+class _Lot:
+    lot_id: uuid.UUID
+    lote_code: str
+    quantities: Dict[str, int] = field(default_factory=dict)
+    earliest_expiration: Optional[date] = None
+
+
+def eligible_stock_query(product_codes: Iterable[str], as_of: date) -> Select:
+    """
+    Stock rows of lots that can still be allocated: not assigned to a flight
+    (rejected assignments free the lot) and holding no expired or uncertified
+    item, since a lot is always loaded as a whole.
+    """
+    bad_item = aliased(LoteProduct)
+    has_bad_item = exists().where(
+        bad_item.lot_id == LoteProduct.lot_id,
+        bad_item.quantity > 0,
+        or_(
+            bad_item.certification_date.is_(None),
+            bad_item.certification_date > as_of,
+            bad_item.expiration_date < as_of,
+        ),
+    )
+    is_assigned = exists().where(
+        Assignment.lot_id == LoteProduct.lot_id,
+        Assignment.status != AssignmentStatus.REJECTED,
+    )
+    return (
+        select(
+            LoteProduct.lot_id,
+            Lote.lote_code,
+            Product.product_code,
+            LoteProduct.quantity,
+            LoteProduct.expiration_date,
+        )
+        .join(Lote, Lote.id == LoteProduct.lot_id)
+        .join(Product, Product.id == LoteProduct.product_id)
+        .where(
+            and_(
+                LoteProduct.quantity > 0,
+                Product.product_code.in_(list(product_codes)),
+                ~is_assigned,
+                ~has_bad_item,
+            )
+        )
+    )
+
+
+class FefoIndex:
+    """
+    In-memory first-expired-first-out index built from one stock query.
+
+    Each product code has a min-heap of (expiration, lote_code, lot_id). Lots
+    are allocated whole, so a lot picked for one product also covers the
+    flight's demand for every other product it holds; lots already taken are
+    skipped lazily when they surface in another product's heap.
+    """
+
+    def __init__(self, rows: Iterable[Any]):
+        self._lots: Dict[uuid.UUID, _Lot] = {}
+        self._heaps: Dict[str, List[Tuple[date, str, uuid.UUID]]] = {}
+        self._taken: Set[uuid.UUID] = set()
+        for row in rows:
+            lot = self._lots.get(row.lot_id)
+            if lot is None:
+                lot = self._lots[row.lot_id] = _Lot(lot_id=row.lot_id, lote_code=row.lote_code)
+            lot.quantities[row.product_code] = lot.quantities.get(row.product_code, 0) + row.quantity
+            if row.expiration_date is not None and (
+                lot.earliest_expiration is None or row.expiration_date < lot.earliest_expiration
+            ):
+                lot.earliest_expiration = row.expiration_date
+            self._heaps.setdefault(row.product_code, []).append(
+                (row.expiration_date or _NO_EXPIRY, row.lote_code, row.lot_id)
+            )
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def _next_lot(self, product_code: str) -> Optional[_Lot]:
+        heap = self._heaps.get(product_code)
+        while heap:
+            _, _, lot_id = heapq.heappop(heap)
+            if lot_id not in self._taken:
+                self._taken.add(lot_id)
+                return self._lots[lot_id]
+        return None
+
+    def allocate(self, demand: FlightDemand) -> FlightAllocation:
+        remaining = {code: qty for code, qty in demand.products.items() if qty > 0}
+        picked: List[AllocatedLot] = []
+        for code in list(remaining):
+            while remaining.get(code, 0) > 0:
+                lot = self._next_lot(code)
+                if lot is None:
+                    break
+                picked.append(AllocatedLot(
+                    lot_id=lot.lot_id,
+                    lote_code=lot.lote_code,
+                    earliest_expiration=lot.earliest_expiration,
+                    quantities=dict(lot.quantities),
+                ))
+                for other, qty in lot.quantities.items():
+                    if other in remaining:
+                        remaining[other] -= qty
+        shortfall = {code: qty for code, qty in remaining.items() if qty > 0}
+        return FlightAllocation(flight=demand.flight, lots=picked, shortfall=shortfall)
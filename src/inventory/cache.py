@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.settings import settings
+
+from .schemas import ProductRead
+
+PRODUCT_CATALOG_CHANNEL = "product_catalog"
+
+
+class ProductCatalogCache:
+    """
+    Bounded in-process cache of catalog rows, addressable by id and product_code.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted past `max_size`. Values are detached `ProductRead` snapshots, never
+    session-bound ORM objects.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, ProductRead]]" = OrderedDict()
+        self._ids_by_code: Dict[str, uuid.UUID] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, product_id: uuid.UUID) -> Optional[ProductRead]:
+        entry = self._entries.get(product_id)
+        if entry is None:
+            return None
+        expires_at, product = entry
+        if expires_at < time.monotonic():
+            self._drop(product_id)
+            return None
+        self._entries.move_to_end(product_id)
+        return product
+
+    def _drop(self, product_id: uuid.UUID) -> None:
+        entry = self._entries.pop(product_id, None)
+        if entry is not None:
+            code = entry[1].product_code
+            if self._ids_by_code.get(code) == product_id:
+                del self._ids_by_code[code]
+
+    def _record(self, product: Optional[ProductRead]) -> Optional[ProductRead]:
+        if product is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return product
+
+    def get(self, product_id: uuid.UUID) -> Optional[ProductRead]:
+        return self._record(self._lookup(product_id))
+
+    def get_by_code(self, product_code: str) -> Optional[ProductRead]:
+        product_id = self._ids_by_code.get(product_code)
+        return self._record(self._lookup(product_id) if product_id is not None else None)
+
+    def get_many(self, product_ids: Iterable[uuid.UUID]) -> Tuple[List[ProductRead], List[uuid.UUID]]:
+        found: List[ProductRead] = []
+        missing: List[uuid.UUID] = []
+        for product_id in product_ids:
+            product = self.get(product_id)
+            if product is None:
+                missing.append(product_id)
+            else:
+                found.append(product)
+        return found, missing
+
+    def put(self, product: Any) -> ProductRead:
+        snapshot = product if isinstance(product, ProductRead) else ProductRead.model_validate(product)
+        self._drop(snapshot.id)
+        self._entries[snapshot.id] = (time.monotonic() + self.ttl, snapshot)
+        self._ids_by_code[snapshot.product_code] = snapshot.id
+        while len(self._entries) > self.max_size:
+            oldest, _ = next(iter(self._entries.items()))
+            self._drop(oldest)
+            self.evictions += 1
+        return snapshot
+
+    def invalidate(self, product_id: Optional[uuid.UUID] = None, product_code: Optional[str] = None) -> None:
+        if product_id is None and product_code is not None:
+            product_id = self._ids_by_code.get(product_code)
+        if product_id is not None and product_id in self._entries:
+            self._drop(product_id)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._ids_by_code.clear()
+
+    def on_notify(self, message: Dict[str, Any]) -> None:
+        """Handler for PRODUCT_CATALOG_CHANNEL notifications from other workers."""
+        raw_id = message.get("id")
+        self.invalidate(
+            product_id=uuid.UUID(raw_id) if raw_id else None,
+            product_code=message.get("product_code"),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+product_cache = ProductCatalogCache(
+    max_size=settings.product_cache_max_size,
+    ttl=settings.product_cache_ttl_seconds,
+)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+
+from sqlalchemy import JSON, Select, func, select, true
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .models import Assignment, Lote, LoteProduct, Product
+from .serialization import dumps, dumps_line, json_object
+from .streaming import NDJSON_MEDIA_TYPE, iter_partitions
+
+ExportFormat = Literal["ndjson", "csv", "arrow"]
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+CSV_MEDIA_TYPE = "text/csv"
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "csv": CSV_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+}
+EXPORT_EXTENSIONS: Dict[str, str] = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrows"}
+
+ITEM_COLUMNS = (
+    "item_id", "product_id", "product_code", "quantity", "expiration_date", "certification_date",
+)
+FLAT_COLUMNS = ("lot_id", "lote_code") + ITEM_COLUMNS + ("assignments",)
+
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def inventory_export_query() -> Select:
+    """
+    One row per lot item (or a single item-less row for empty lots), ordered by
+    lot so consecutive rows can be regrouped while streaming. Assignments are
+    aggregated per lot in a lateral subquery instead of multiplying item rows.
+    """
+    assignments = (
+        select(
+            func.json_agg(
+                json_object(
+                    id=Assignment.id,
+                    flight_assigned=Assignment.flight_assigned,
+                    status=Assignment.status,
+                ),
+                type_=JSON,
+            ).label("assignments")
+        )
+        .where(Assignment.lot_id == Lote.id)
+        .lateral("lot_assignments")
+    )
+    return (
+        select(
+            Lote.id.label("lot_id"),
+            Lote.lote_code,
+            LoteProduct.id.label("item_id"),
+            LoteProduct.product_id,
+            Product.product_code,
+            LoteProduct.quantity,
+            LoteProduct.expiration_date,
+            LoteProduct.certification_date,
+            assignments.c.assignments,
+        )
+        .select_from(Lote)
+        .outerjoin(assignments, true())
+        .outerjoin(LoteProduct, LoteProduct.lot_id == Lote.id)
+        .outerjoin(Product, Product.id == LoteProduct.product_id)
+        .order_by(Lote.id, LoteProduct.id)
+    )
+
+
+def _item(row: Any) -> Optional[Dict[str, Any]]:
+    if row.item_id is None:
+        return None
+    return {col: getattr(row, col) for col in ITEM_COLUMNS}
+
+
+async def _iter_ndjson(sessions: async_sessionmaker) -> AsyncIterator[bytes]:
+    doc: Optional[Dict[str, Any]] = None
+    async for partition in iter_partitions(inventory_export_query(), sessions):
+        lines = []
+        for row in partition:
+            if doc is None or doc["id"] != row.lot_id:
+                if doc is not None:
+                    lines.append(dumps_line(doc))
+                doc = {
+                    "id": row.lot_id,
+                    "lote_code": row.lote_code,
+                    "items": [],
+                    "assignments": row.assignments or [],
+                }
+            item = _item(row)
+            if item is not None:
+                doc["items"].append(item)
+        if lines:
+            yield b"".join(lines)
+    if doc is not None:
+        yield dumps_line(doc)
+
+
+def _drain(buf: io.IOBase) -> Any:
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+async def _iter_csv(sessions: async_sessionmaker) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(FLAT_COLUMNS)
+    async for partition in iter_partitions(inventory_export_query(), sessions):
+        for row in partition:
+            writer.writerow([
+                *(getattr(row, col) for col in FLAT_COLUMNS[:-1]),
+                dumps(row.assignments or []).decode(),
+            ])
+        yield _drain(buf).encode()
+    if buf.tell():
+        yield _drain(buf).encode()
+
+
+async def _iter_arrow(sessions: async_sessionmaker) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("lot_id", pa.string()),
+        ("lote_code", pa.string()),
+        ("item_id", pa.string()),
+        ("product_id", pa.string()),
+        ("product_code", pa.string()),
+        ("quantity", pa.int32()),
+        ("expiration_date", pa.date32()),
+        ("certification_date", pa.date32()),
+        ("assignments", pa.list_(pa.struct([
+            ("id", pa.string()),
+            ("flight_assigned", pa.string()),
+            ("status", pa.string()),
+        ]))),
+    ])
+    buf = io.BytesIO()
+    writer = pa.ipc.new_stream(buf, schema)
+    yield _drain(buf)
+    async for partition in iter_partitions(inventory_export_query(), sessions):
+        columns: Dict[str, list] = {name: [] for name in FLAT_COLUMNS}
+        for row in partition:
+            for name in FLAT_COLUMNS:
+                value = getattr(row, name)
+                if name in ("lot_id", "item_id", "product_id") and value is not None:
+                    value = str(value)
+                columns[name].append(value)
+        writer.write_batch(pa.record_batch([columns[name] for name in FLAT_COLUMNS], schema=schema))
+        yield _drain(buf)
+    writer.close()
+    yield _drain(buf)
+
+
+def iter_inventory_export(fmt: ExportFormat, sessions: async_sessionmaker) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        return _iter_csv(sessions)
+    if fmt == "arrow":
+        return _iter_arrow(sessions)
+    return _iter_ndjson(sessions)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.settings import settings
+
+INVENTORY_CHANGES_CHANNEL = "inventory_changes"
+
+# Sent instead of the backlog when a subscriber falls too far behind: the
+# client should refetch whatever it displays.
+RESYNC_EVENT: Dict[str, Any] = {"table": None, "op": "resync"}
+
+_EventKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def _key(event: Dict[str, Any]) -> _EventKey:
+    return event.get("table"), event.get("lot_id"), event.get("product_id"), event.get("flight")
+
+
+@dataclass(frozen=True)
+class FeedFilter:
+    """Matches events touching any of the given lots, products or flights; empty matches all."""
+
+    lot_ids: FrozenSet[str] = frozenset()
+    product_ids: FrozenSet[str] = frozenset()
+    flights: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def build(cls, lot_ids: Iterable[Any] = (), product_ids: Iterable[Any] = (), flights: Iterable[str] = ()):
+        return cls(frozenset(map(str, lot_ids)), frozenset(map(str, product_ids)), frozenset(flights))
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if not (self.lot_ids or self.product_ids or self.flights):
+            return True
+        return (
+            event.get("lot_id") in self.lot_ids
+            or event.get("product_id") in self.product_ids
+            or event.get("flight") in self.flights
+        )
+
+
+@dataclass(eq=False)
+class FeedSubscriber:
+    """
+    Bounded, coalescing mailbox of one client. Repeated changes to the same
+    (table, lot, product, flight) collapse into the latest one; past
+    `max_pending` distinct keys the backlog is dropped for a single resync.
+    """
+
+    filter: FeedFilter
+    max_pending: int
+    coalesced: int = 0
+    resyncs: int = 0
+    _pending: "OrderedDict[_EventKey, Dict[str, Any]]" = field(default_factory=OrderedDict)
+    _overflowed: bool = False
+    _ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if self._overflowed:
+            return
+        key = _key(event)
+        if key in self._pending:
+            self._pending[key] = event
+            self.coalesced += 1
+        elif len(self._pending) >= self.max_pending:
+            self.resync()
+            return
+        else:
+            self._pending[key] = event
+        self._ready.set()
+
+    def resync(self) -> None:
+        self._pending.clear()
+        self._overflowed = True
+        self.resyncs += 1
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        """Waits up to `timeout` seconds; an empty list means nothing happened (send a heartbeat)."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return [RESYNC_EVENT]
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class ChangeFeedHub:
+    """
+    Fans the inventory_changes NOTIFY stream of this worker's single LISTEN
+    connection out to SSE/WebSocket subscribers. Publishing never blocks: slow
+    clients only grow their own bounded mailbox.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self.published = 0
+        self._subscribers: Set[FeedSubscriber] = set()
+
+    def subscribe(self, feed_filter: FeedFilter) -> FeedSubscriber:
+        subscriber = FeedSubscriber(filter=feed_filter, max_pending=self.max_pending)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: FeedSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.published += 1
+        for subscriber in self._subscribers:
+            if subscriber.filter.matches(event):
+                subscriber.offer(event)
+
+    def resync_all(self) -> None:
+        # Notifications sent while LISTEN was down are lost for good.
+        for subscriber in self._subscribers:
+            subscriber.resync()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "coalesced": sum(s.coalesced for s in self._subscribers),
+            "resyncs": sum(s.resyncs for s in self._subscribers),
+            "max_pending": self.max_pending,
+        }
+
+
+change_feed = ChangeFeedHub(max_pending=settings.feed_max_pending)
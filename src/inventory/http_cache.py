@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+from typing import Any, Dict, Iterable, Optional, Union
+
+from fastapi import Request, Response, status
+
+from src.settings import settings
+
+# Tags are weak: GZipMiddleware may re-encode the body without touching them.
+WEAK_PREFIX = "W/"
+
+
+def _cache_control() -> str:
+    # max-age=0 still lets clients keep the body, they just revalidate every time.
+    return f"private, max-age={settings.http_cache_max_age}, must-revalidate"
+
+
+def version_etag(kind: str, row_id: uuid.UUID, version: Union[int, str]) -> str:
+    return f'{WEAK_PREFIX}"{kind}-{row_id}-{version}"'
+
+
+def composite_version(*parts: Any) -> str:
+    """Short stable token for a version made of several values (counts, sums, timestamps)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(f"{part};".encode())
+    return digest.hexdigest()
+
+
+def page_etag(rows: Iterable[Any], *extra: Optional[str]) -> str:
+    """Tag of a page of versioned rows; `extra` carries anything else in the response (e.g. the cursor)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(f"{row.id}:{row.version};".encode())
+    for part in extra:
+        digest.update(f"|{part or ''}".encode())
+    return f'{WEAK_PREFIX}"{digest.hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[len(WEAK_PREFIX):] if tag.startswith(WEAK_PREFIX) else tag
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": _cache_control()}
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    # A 304 repeats the headers of the 200 it stands for (ETag, Cache-Control, cursor...).
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import json
+import uuid
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .schemas import BulkLotItemResult, BulkLotItemStatus
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_MEDIA_TYPE = "text/csv"
+
+LOT_ITEM_FIELDS = ("lot_id", "product_id", "quantity", "expiration_date", "certification_date")
+
+# Column order of the COPY staging table; row_no lets results map back to input rows.
+STAGING_COLUMNS = ("row_no",) + LOT_ITEM_FIELDS
+
+StagedRow = Tuple[int, uuid.UUID, uuid.UUID, int, Optional[date], Optional[date]]
+
+
+def _optional_date(value: Any) -> Optional[date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def to_staged_row(row_no: int, raw: Dict[str, Any]) -> StagedRow:
+    """Validates one input row; raises ValueError with a short reason."""
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    try:
+        lot_id = uuid.UUID(str(raw["lot_id"]).strip())
+        product_id = uuid.UUID(str(raw["product_id"]).strip())
+        quantity = int(raw["quantity"])
+    except KeyError as exc:
+        raise ValueError(f"missing field {exc.args[0]}") from exc
+    except (TypeError, ValueError) as exc:
+        raise ValueError(str(exc)) from exc
+    if quantity < 0:
+        raise ValueError("quantity must be a non-negative integer")
+    return (
+        row_no,
+        lot_id,
+        product_id,
+        quantity,
+        _optional_date(raw.get("expiration_date")),
+        _optional_date(raw.get("certification_date")),
+    )
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if pending:
+        yield pending.decode("utf-8")
+
+
+async def _iter_raw_rows(media_type: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    if media_type == JSON_MEDIA_TYPE:
+        body = b"".join([chunk async for chunk in chunks])
+        payload = json.loads(body or b"[]")
+        if not isinstance(payload, list):
+            raise ValueError("JSON body must be an array of lot items")
+        for raw in payload:
+            yield raw
+    elif media_type in NDJSON_MEDIA_TYPES:
+        async for line in _iter_lines(chunks):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield line
+    elif media_type == CSV_MEDIA_TYPE:
+        header: Optional[List[str]] = None
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            values = next(csv.reader([line.rstrip("\r")]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            yield dict(zip(header, values))
+    else:
+        raise ValueError(f"Unsupported media type: {media_type}")
+
+
+class LotItemRowReader:
+    """
+    Turns a request body (JSON array, NDJSON or CSV) into COPY-ready records.
+
+    Valid rows are yielded lazily so COPY consumes the body as it arrives;
+    rejected rows are kept in `errors` with their 1-based input position.
+    """
+
+    def __init__(self, media_type: str, chunks: AsyncIterator[bytes]):
+        self.media_type = media_type
+        self.chunks = chunks
+        self.received = 0
+        self.errors: List[BulkLotItemResult] = []
+
+    async def records(self) -> AsyncIterator[StagedRow]:
+        async for raw in _iter_raw_rows(self.media_type, self.chunks):
+            self.received += 1
+            try:
+                yield to_staged_row(self.received, raw)
+            except ValueError as exc:
+                self.errors.append(
+                    BulkLotItemResult(row=self.received, status=BulkLotItemStatus.INVALID_ROW, error=str(exc))
+                )
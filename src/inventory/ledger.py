@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import AsyncSessionLocal
+from src.settings import settings
+
+from .models import StockMovement
+
+logger = logging.getLogger(__name__)
+
+MOVEMENT_COLUMNS = (
+    StockMovement.id, StockMovement.lot_id, StockMovement.product_id, StockMovement.delta,
+    StockMovement.reason, StockMovement.applied, StockMovement.created_at,
+)
+
+# Folds the oldest pending movements into lote_products in one statement.
+# Compaction is the only place the ledger takes row locks, and only one runs at
+# a time (see compact_stock_movements). Appends are never checked against the
+# stock, so a fold that would drive an item below zero is clamped at zero and
+# the difference is recorded as an applied 'overdraw_correction' movement,
+# keeping lote_products equal to the sum of the applied ledger.
+_FOLD_PENDING = text(
+    """
+    WITH pending AS (
+        UPDATE stock_movements SET applied = true
+        WHERE id IN (
+            SELECT id FROM stock_movements WHERE NOT applied ORDER BY id LIMIT :batch_size
+        )
+        RETURNING lot_id, product_id, delta
+    ),
+    folded AS (
+        SELECT lot_id, product_id, sum(delta) AS delta
+        FROM pending
+        GROUP BY lot_id, product_id
+    ),
+    locked AS (
+        SELECT lp.lot_id, lp.product_id, lp.quantity
+        FROM lote_products lp
+        JOIN folded f ON f.lot_id = lp.lot_id AND f.product_id = lp.product_id
+        ORDER BY lp.lot_id, lp.product_id
+        FOR UPDATE OF lp
+    ),
+    balanced AS (
+        SELECT f.lot_id, f.product_id, f.delta,
+               greatest(-(coalesce(l.quantity, 0) + f.delta), 0) AS correction
+        FROM folded f
+        LEFT JOIN locked l ON l.lot_id = f.lot_id AND l.product_id = f.product_id
+    ),
+    corrected AS (
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT lot_id, product_id, correction, 'overdraw_correction', true
+        FROM balanced WHERE correction > 0
+        RETURNING 1
+    ),
+    merged AS (
+        INSERT INTO lote_products (lot_id, product_id, quantity)
+        SELECT lot_id, product_id, delta + correction FROM balanced ORDER BY lot_id, product_id
+        ON CONFLICT ON CONSTRAINT uq_lote_products_lot_id_product_id DO UPDATE
+        SET quantity = lote_products.quantity + excluded.quantity,
+            updated_at = now()
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM pending) AS movements,
+           (SELECT count(*) FROM merged) AS items,
+           (SELECT count(*) FROM corrected) AS corrections
+    """
+)
+
+# Stock of one lot at :at = snapshot (lote_products, which already includes
+# every applied movement) minus applied movements after :at plus pending
+# movements up to :at. Both ranges come off ix_stock_movements_lot_id_created_at.
+LOT_STOCK_AT = text(
+    """
+    WITH tail AS (
+        SELECT product_id,
+               sum(CASE WHEN applied THEN -delta ELSE delta END) AS adjustment
+        FROM stock_movements
+        WHERE lot_id = :lot_id
+          AND ((applied AND created_at > :at) OR (NOT applied AND created_at <= :at))
+        GROUP BY product_id
+    )
+    SELECT coalesce(lp.product_id, t.product_id) AS product_id,
+           coalesce(lp.quantity, 0) + coalesce(t.adjustment, 0) AS quantity
+    FROM (SELECT product_id, quantity FROM lote_products WHERE lot_id = :lot_id) lp
+    FULL JOIN tail t ON t.product_id = lp.product_id
+    """
+)
+
+
+async def compact_stock_movements(db: AsyncSession, batch_size: int) -> int:
+    """
+    Folds up to `batch_size` pending movements into lote_products and returns
+    how many were folded. Workers that find another compaction running skip.
+    """
+    locked = (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('stock_compaction'))"))).scalar()
+    if not locked:
+        await db.rollback()
+        return 0
+    # Tells the ledger trigger not to record these lote_products writes again.
+    await db.execute(text("SELECT set_config('app.compacting', 'on', true)"))
+    row = (await db.execute(_FOLD_PENDING, {"batch_size": batch_size})).one()
+    await db.commit()
+    if row.corrections:
+        logger.warning("Clamped %d overdrawn lot items at zero while compacting", row.corrections)
+    return row.movements
+
+
+class StockCompactor:
+    """Background task that drains the pending ledger every `interval` seconds."""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        folded = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                batch = await compact_stock_movements(db, self.batch_size)
+            folded += batch
+            if batch < self.batch_size:
+                self.last_run = datetime.utcnow()
+                return folded
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                folded = await self.run_once()
+                if folded:
+                    logger.info("Folded %d stock movements into lote_products", folded)
+            except Exception:
+                logger.exception("Stock movement compaction failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="stock-compactor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+stock_compactor = StockCompactor(
+    interval=settings.stock_compaction_interval_seconds,
+    batch_size=settings.stock_compaction_batch_size,
+)
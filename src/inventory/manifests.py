@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import JSON, Select, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from .models import Assignment, AssignmentStatus, Lote, LoteProduct, Product
+from .schemas import FlightManifest, ManifestLine
+from .serialization import json_object
+
+
+def flight_manifest_query(flights: Sequence[str], status: Optional[AssignmentStatus] = None) -> Select:
+    """
+    One row per (flight, product) over every lot assigned to the flights, with
+    the per-lot breakdown aggregated into a JSON array in the same pass.
+    Backed by ix_assignments_flight_assigned and the lote_products lot_id index.
+    """
+    lots = func.json_agg(
+        aggregate_order_by(
+            json_object(
+                lot_id=Lote.id,
+                lote_code=Lote.lote_code,
+                status=Assignment.status,
+                quantity=LoteProduct.quantity,
+                expiration_date=LoteProduct.expiration_date,
+            ),
+            LoteProduct.expiration_date.asc().nulls_last(),
+            Lote.lote_code,
+        ),
+        type_=JSON,
+    )
+    stmt = (
+        select(
+            Assignment.flight_assigned.label("flight"),
+            Product.id.label("product_id"),
+            Product.product_code,
+            Product.product_name,
+            func.sum(LoteProduct.quantity).label("total_quantity"),
+            func.min(LoteProduct.expiration_date).label("earliest_expiration"),
+            lots.label("lots"),
+        )
+        .join(Lote, Lote.id == Assignment.lot_id)
+        .join(LoteProduct, LoteProduct.lot_id == Assignment.lot_id)
+        .join(Product, Product.id == LoteProduct.product_id)
+        .where(Assignment.flight_assigned.in_(list(flights)), LoteProduct.quantity > 0)
+        .group_by(Assignment.flight_assigned, Product.id, Product.product_code, Product.product_name)
+        .order_by(Assignment.flight_assigned, Product.product_code)
+    )
+    if status is not None:
+        stmt = stmt.where(Assignment.status == status)
+    return stmt
+
+
+def build_manifests(flights: Sequence[str], rows: Iterable[Any]) -> List[FlightManifest]:
+    # Flights with nothing assigned still get an (empty) manifest, in request order.
+    lines: Dict[str, List[ManifestLine]] = {flight: [] for flight in flights}
+    for row in rows:
+        lines[row.flight].append(ManifestLine.model_validate(row._mapping))
+    manifests = []
+    for flight, flight_lines in lines.items():
+        lot_ids = {lot.lot_id for line in flight_lines for lot in line.lots}
+        manifests.append(FlightManifest(
+            flight=flight,
+            total_quantity=sum(line.total_quantity for line in flight_lines),
+            lot_count=len(lot_ids),
+            lines=flight_lines,
+        ))
+    return manifests
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
-from typing import List
+from typing import Dict, FrozenSet, List
 
 from sqlalchemy import (
-    String, Integer, Date, Enum as SAEnum, ForeignKey
+    String, Integer, BigInteger, Boolean, Date, Enum as SAEnum, ForeignKey, Index, UniqueConstraint,
+    text, func,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database import Base
-from src.models import UUIDPrimaryKey, Timestamp
+from src.models import UUIDPrimaryKey, Timestamp, RowVersion
 
 class AssignmentStatus(str, Enum):
     DRAFT = "draft"
@@ -19,8 +21,29 @@ class AssignmentStatus(str, Enum):
     REJECTED = "rejected"
 
 
-class Product(Base, UUIDPrimaryKey, Timestamp):
+# Allowed status moves; loaded is terminal, rejected lots can be re-drafted.
+ASSIGNMENT_TRANSITIONS: Dict[AssignmentStatus, FrozenSet[AssignmentStatus]] = {
+    AssignmentStatus.DRAFT: frozenset({AssignmentStatus.READY, AssignmentStatus.REJECTED}),
+    AssignmentStatus.READY: frozenset({AssignmentStatus.LOADED, AssignmentStatus.REJECTED, AssignmentStatus.DRAFT}),
+    AssignmentStatus.LOADED: frozenset(),
+    AssignmentStatus.REJECTED: frozenset({AssignmentStatus.DRAFT}),
+}
+
+
+class Product(Base, UUIDPrimaryKey, Timestamp, RowVersion):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_product_code_prefix", text("lower(product_code) text_pattern_ops")),
+        Index(
+            "ix_products_product_code_trgm", "product_code",
+            postgresql_using="gin", postgresql_ops={"product_code": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_products_product_name_trgm", "product_name",
+            postgresql_using="gin", postgresql_ops={"product_name": "gin_trgm_ops"},
+        ),
+    )
 
     product_code: Mapped[str] = mapped_column(String(55), nullable=False, index=True)
     product_name: Mapped[str] = mapped_column(String(120), nullable=False)
@@ -30,8 +53,16 @@ class Product(Base, UUIDPrimaryKey, Timestamp):
     )
 
 
-class Lote(Base, UUIDPrimaryKey, Timestamp):
+class Lote(Base, UUIDPrimaryKey, Timestamp, RowVersion):
     __tablename__ = "lotes"
+    __table_args__ = (
+        Index("ix_lotes_created_at_id", "created_at", "id"),
+        Index("ix_lotes_lote_code_prefix", text("lower(lote_code) text_pattern_ops")),
+        Index(
+            "ix_lotes_lote_code_trgm", "lote_code",
+            postgresql_using="gin", postgresql_ops={"lote_code": "gin_trgm_ops"},
+        ),
+    )
 
     lote_code: Mapped[str] = mapped_column(String(55), nullable=False, unique=True, index=True)
     items: Mapped[List["LoteProduct"]] = relationship(
@@ -44,8 +75,17 @@ class Lote(Base, UUIDPrimaryKey, Timestamp):
     )
 
 
-class LoteProduct(Base, UUIDPrimaryKey, Timestamp):
+class LoteProduct(Base, UUIDPrimaryKey, Timestamp, RowVersion):
     __tablename__ = "lote_products"
+    __table_args__ = (
+        UniqueConstraint("lot_id", "product_id", name="uq_lote_products_lot_id_product_id"),
+        Index(
+            "ix_lote_products_expiring",
+            "expiration_date", "product_id",
+            postgresql_include=["quantity", "lot_id"],
+            postgresql_where=text("expiration_date IS NOT NULL AND quantity > 0"),
+        ),
+    )
 
     lot_id: Mapped[str] = mapped_column(ForeignKey("lotes.id", ondelete="CASCADE"), nullable=False, index=True)
     product_id: Mapped[str] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -58,7 +98,7 @@ class LoteProduct(Base, UUIDPrimaryKey, Timestamp):
     product: Mapped["Product"] = relationship(back_populates="lot_items")
 
 
-class Assignment(Base, UUIDPrimaryKey, Timestamp):
+class Assignment(Base, UUIDPrimaryKey, Timestamp, RowVersion):
     __tablename__ = "assignments"
 
     lot_id: Mapped[str] = mapped_column(
@@ -80,3 +120,46 @@ class Assignment(Base, UUIDPrimaryKey, Timestamp):
     )
 
     lote: Mapped["Lote"] = relationship(back_populates="assignments")
+
+
+class ProductStock(Base):
+    """
+    Per-product stock summary maintained by statement-level triggers on
+    lote_products and assignments (see migrations 2c7d9e4a1f63 and
+    c5e1a8d3f907). Read-only from the application.
+    """
+    __tablename__ = "product_stock"
+
+    product_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_quantity: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    lot_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    earliest_expiration: Mapped[date | None] = mapped_column(Date, nullable=True)
+    quantity_by_status: Mapped[Dict[str, int]] = mapped_column(
+        JSONB, nullable=False, server_default=text("'{}'::jsonb")
+    )
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+
+class StockMovement(Base):
+    """
+    Append-only stock ledger. Pending rows (applied = false) are folded into
+    lote_products by the compaction job; writes made straight to lote_products
+    are recorded here already applied (see migration 6a2e8f4c1b57), as are the
+    corrections compaction adds when a fold would overdraw an item.
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_lot_id_created_at", "lot_id", "created_at"),
+        Index("ix_stock_movements_pending", "id", postgresql_where=text("NOT applied")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    lot_id: Mapped[str] = mapped_column(ForeignKey("lotes.id", ondelete="CASCADE"), nullable=False)
+    product_id: Mapped[str] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    delta: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Plain string so new reasons need no migration.
+    reason: Mapped[str] = mapped_column(String(40), nullable=False)
+    applied: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("false"))
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
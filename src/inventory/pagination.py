@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+
+
+def keyset(stmt: Select, model: Any, after: Optional[str] = None) -> Select:
+    """
+    Orders `stmt` by (created_at, id) and, when `after` is given, resumes right
+    after that position. Backed by the (created_at, id) composite indexes.
+    """
+    stmt = stmt.order_by(model.created_at, model.id)
+    if after:
+        created_at, row_id = decode_cursor(after)
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(created_at, row_id))
+    return stmt
+
+
+def keyset_page(stmt: Select, model: Any, *, limit: int, after: Optional[str] = None) -> Select:
+    # One extra row tells us whether there is a next page without a COUNT(*).
+    return keyset(stmt, model, after).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
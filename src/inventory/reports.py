@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+from typing import Literal, Optional
+
+from sqlalchemy import Date, Select, and_, cast, func, literal_column, select
+
+from .models import Lote, LoteProduct, Product
+
+ExpiryBucket = Literal["day", "week"]
+
+
+def _expiring_window(start: date, end: date, product_id: Optional[uuid.UUID]):
+    # `quantity > 0` is rendered as a literal so the planner can match the
+    # partial ix_lote_products_expiring index even with generic plans.
+    clauses = [
+        LoteProduct.expiration_date >= start,
+        LoteProduct.expiration_date < end + timedelta(days=1),
+        LoteProduct.quantity > literal_column("0"),
+    ]
+    if product_id is not None:
+        clauses.append(LoteProduct.product_id == product_id)
+    return and_(*clauses)
+
+
+def expiry_buckets_query(
+    start: date, end: date, bucket: ExpiryBucket, product_id: Optional[uuid.UUID] = None
+) -> Select:
+    # `bucket` is a validated Literal, safe to inline; a bound parameter would
+    # make the SELECT and GROUP BY expressions differ.
+    bucket_start = cast(
+        func.date_trunc(literal_column(f"'{bucket}'"), LoteProduct.expiration_date), Date
+    ).label("bucket_start")
+    return (
+        select(
+            LoteProduct.product_id,
+            Product.product_code,
+            bucket_start,
+            func.sum(LoteProduct.quantity).label("quantity"),
+            func.count(LoteProduct.lot_id.distinct()).label("lot_count"),
+        )
+        .join(Product, Product.id == LoteProduct.product_id)
+        .where(_expiring_window(start, end, product_id))
+        .group_by(LoteProduct.product_id, Product.product_code, bucket_start)
+        .order_by(bucket_start, Product.product_code)
+    )
+
+
+def expiring_items_query(start: date, end: date, product_id: Optional[uuid.UUID] = None) -> Select:
+    return (
+        select(
+            LoteProduct.id,
+            LoteProduct.lot_id,
+            Lote.lote_code,
+            LoteProduct.product_id,
+            Product.product_code,
+            LoteProduct.quantity,
+            LoteProduct.expiration_date,
+            LoteProduct.certification_date,
+        )
+        .join(Lote, Lote.id == LoteProduct.lot_id)
+        .join(Product, Product.id == LoteProduct.product_id)
+        .where(_expiring_window(start, end, product_id))
+        .order_by(LoteProduct.expiration_date, LoteProduct.product_id)
+    )
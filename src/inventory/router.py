@@ -1,22 +1,47 @@
 from __future__ import annotations
 
 import uuid
-from typing import List, Optional
+from datetime import date, datetime
+from typing import AsyncIterator, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select
 
 from .schemas import (
     ProductCreate, ProductUpdate, ProductRead, 
     LoteCreate, LoteUpdate, LoteRead, LoteDetailed,
+    LoteDetailedBatchRequest, LoteDetailedBatchResponse,
     LoteProductCreate, LoteProductUpdate, LoteProductRead,
     AssignmentCreate, AssignmentUpdate, AssignmentRead,
+    BulkLotItemsResponse,
+    ProductStockRead, ProductStockBatchRequest, ProductStockBatchResponse,
+    AllocationRequest, AllocationResponse,
+    ExpiringStockReport,
+    AssignmentBulkTransition, AssignmentBulkTransitionResponse,
+    FlightManifest, ManifestBatchRequest, ManifestBatchResponse,
+    StockMovementBatch, StockMovementRead, LotStockAt,
+    SearchResponse,
 )
-from .models import Product, Lote
+from .ingest import CSV_MEDIA_TYPE, JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPES, LotItemRowReader
+from .export import (
+    EXPORT_EXTENSIONS, EXPORT_MEDIA_TYPES, ExportFormat,
+    arrow_available, iter_inventory_export,
+)
+from .models import AssignmentStatus, Product, Lote
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset
+from .cache import product_cache
+from .feed import FeedFilter, FeedSubscriber, change_feed
+from .http_cache import cache_headers, not_modified, not_modified_response, version_etag
 from .service import CateringService
-from src.database import get_db
+from .reports import ExpiryBucket, expiring_items_query
+from .search import SEARCH_KINDS, SearchKind, SearchMode, code_trie
+from .serialization import LOTE_COLUMNS, PRODUCT_COLUMNS, dumps, json_response
+from .streaming import ndjson_rows_response
+from src.settings import settings
+from src.database import get_db, get_read_db, get_read_sessionmaker
 
 from src.inventory.exceptions import (
     HTTP_LOT_DUPLICATE, HTTP_LOT_NOT_FOUND,
@@ -29,17 +54,62 @@ PRODUCT_DUPLICATE = {"error_code": "PRODUCT_DUPLICATE", "detail": "The provided
 PRODUCT_NOT_FOUND = {"error_code": "PRODUCT_NOT_FOUND", "detail": "The requested product was not found."}
 ASSIGNMENT_NOT_FOUND = {"error_code": "ASSIGNMENT_NOT_FOUND", "detail": "The requested assignment was not found."}
 LOTE_PRODUCT_NOT_FOUND = {"error_code": "LOTE_PRODUCT_NOT_FOUND", "detail": "The requested lot item was not found."}
+INVALID_CURSOR = {"error_code": "INVALID_CURSOR", "detail": "The provided pagination cursor is not valid."}
+INVALID_TRANSITION = {
+    "error_code": "INVALID_TRANSITION",
+    "detail": "The requested assignment status transition is not allowed.",
+}
+INVALID_DATE_WINDOW = {"error_code": "INVALID_DATE_WINDOW", "detail": "`end` must not be before `start`."}
+INVALID_BULK_BODY = {"error_code": "INVALID_BULK_BODY", "detail": "The bulk payload could not be parsed."}
+EXPORT_FORMAT_UNAVAILABLE = {
+    "error_code": "EXPORT_FORMAT_UNAVAILABLE",
+    "detail": "Arrow export requires pyarrow to be installed on the server.",
+}
+UNSUPPORTED_MEDIA_TYPE = {
+    "error_code": "UNSUPPORTED_MEDIA_TYPE",
+    "detail": "Send application/json, application/x-ndjson or text/csv.",
+}
+INVALID_SEARCH_QUERY = {"error_code": "INVALID_SEARCH_QUERY", "detail": "`q` must not be blank."}
 
 HTTP_PRODUCT_DUPLICATE = HTTPException(status_code=status.HTTP_409_CONFLICT, detail=PRODUCT_DUPLICATE)
 HTTP_PRODUCT_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=PRODUCT_NOT_FOUND)
 HTTP_ASSIGNMENT_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ASSIGNMENT_NOT_FOUND)
 HTTP_LOTE_PRODUCT_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=LOTE_PRODUCT_NOT_FOUND)
+HTTP_INVALID_CURSOR = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_CURSOR)
+HTTP_INVALID_TRANSITION = HTTPException(status_code=status.HTTP_409_CONFLICT, detail=INVALID_TRANSITION)
+HTTP_INVALID_DATE_WINDOW = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_DATE_WINDOW)
+HTTP_INVALID_BULK_BODY = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_BULK_BODY)
+HTTP_EXPORT_FORMAT_UNAVAILABLE = HTTPException(
+    status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=EXPORT_FORMAT_UNAVAILABLE
+)
+HTTP_UNSUPPORTED_MEDIA_TYPE = HTTPException(
+    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=UNSUPPORTED_MEDIA_TYPE
+)
+HTTP_INVALID_SEARCH_QUERY = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_SEARCH_QUERY)
+
+ListFormat = Literal["json", "ndjson"]
+
+
+products_router = APIRouter(prefix="/products", tags=["products"], default_response_class=ORJSONResponse)
+lotes_router = APIRouter(prefix="/lotes", tags=["lotes"], default_response_class=ORJSONResponse)
+lot_items_router = APIRouter(prefix="/lot-items", tags=["lote_products"], default_response_class=ORJSONResponse)
+assignments_router = APIRouter(
+    prefix="/assignments", tags=["assignments"], default_response_class=ORJSONResponse
+)
+manifests_router = APIRouter(prefix="/manifests", tags=["manifests"], default_response_class=ORJSONResponse)
+feed_router = APIRouter(prefix="/feed", tags=["feed"])
+search_router = APIRouter(prefix="/search", tags=["search"], default_response_class=ORJSONResponse)
 
+MAX_SEARCH_LIMIT = 100
+
+def _page_response(request: Request, items: List[dict], next_cursor: Optional[str], etag: str) -> Response:
+    headers = cache_headers(etag)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if not_modified(request, etag):
+        return not_modified_response(headers)
+    return json_response(items, headers=headers)
 
-products_router = APIRouter(prefix="/products", tags=["products"])
-lotes_router = APIRouter(prefix="/lotes", tags=["lotes"])
-lot_items_router = APIRouter(prefix="/lot-items", tags=["lote_products"])
-assignments_router = APIRouter(prefix="/assignments", tags=["assignments"])
 
 @products_router.post("", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
 async def create_product(data: ProductCreate, db: AsyncSession = Depends(get_db)):
@@ -63,8 +133,32 @@ async def update_product(product_id: uuid.UUID, data: ProductUpdate, db: AsyncSe
         raise HTTP_DATABASE_ERROR
 
 
+@products_router.get("/cache/stats")
+async def product_cache_stats():
+    return product_cache.stats()
+
+
+@products_router.post("/stock:batch", response_model=ProductStockBatchResponse)
+async def get_product_stock_batch(data: ProductStockBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    try:
+        stock, missing = await CateringService.get_product_stock_many(db, data.product_ids)
+        return ProductStockBatchResponse(stock=stock, missing_ids=missing)
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@products_router.get("/{product_id}/stock", response_model=ProductStockRead)
+async def get_product_stock(product_id: uuid.UUID, db: AsyncSession = Depends(get_read_db)):
+    try:
+        return await CateringService.get_product_stock(db, product_id)
+    except LookupError:
+        raise HTTP_PRODUCT_NOT_FOUND
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
 @products_router.get("/{product_id}", response_model=ProductRead)
-async def get_product(product_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_product(product_id: uuid.UUID, db: AsyncSession = Depends(get_read_db)):
     try:
         obj = await CateringService.get_product(db, product_id)
         return obj
@@ -85,12 +179,23 @@ async def delete_product(product_id: uuid.UUID, db: AsyncSession = Depends(get_d
 
 
 @products_router.get("", response_model=List[ProductRead])
-async def list_products(db: AsyncSession = Depends(get_db)):
+async def list_products(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description=f"Cursor returned in the {NEXT_CURSOR_HEADER} header"),
+    format: ListFormat = Query("json", description="ndjson streams every row from `after` onwards"),
+    db: AsyncSession = Depends(get_read_db),
+    sessions: async_sessionmaker = Depends(get_read_sessionmaker),
+):
     try:
-        res = await db.execute(select(Product))
-        return list(res.scalars().all())
+        if format == "ndjson":
+            return ndjson_rows_response(keyset(select(*PRODUCT_COLUMNS), Product, after), sessions)
+        items, next_cursor, etag = await CateringService.list_products_page(db, limit=limit, after=after)
+    except ValueError:
+        raise HTTP_INVALID_CURSOR
     except Exception:
         raise HTTP_DATABASE_ERROR
+    return _page_response(request, items, next_cursor, etag)
 
 
 @lotes_router.post("", response_model=LoteRead, status_code=status.HTTP_201_CREATED)
@@ -105,6 +210,31 @@ async def create_lote(data: LoteCreate, db: AsyncSession = Depends(get_db)):
         raise HTTP_DATABASE_ERROR
 
 
+@lotes_router.get("/export", response_class=StreamingResponse)
+async def export_inventory(
+    format: ExportFormat = Query("ndjson"),
+    sessions: async_sessionmaker = Depends(get_read_sessionmaker),
+):
+    if format == "arrow" and not arrow_available():
+        raise HTTP_EXPORT_FORMAT_UNAVAILABLE
+    return StreamingResponse(
+        iter_inventory_export(format, sessions),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="inventory.{EXPORT_EXTENSIONS[format]}"'},
+    )
+
+
+@lotes_router.post("/detailed:batch", response_model=LoteDetailedBatchResponse)
+async def get_lotes_detailed_batch(data: LoteDetailedBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    try:
+        lotes, missing_ids, missing_codes = await CateringService.get_lotes_detailed_many(
+            db, lot_ids=data.lot_ids, lote_codes=data.lote_codes
+        )
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+    return json_response({"lotes": lotes, "missing_ids": missing_ids, "missing_codes": missing_codes})
+
+
 @lotes_router.patch("/{lot_id}", response_model=LoteRead)
 async def update_lote(lot_id: uuid.UUID, data: LoteUpdate, db: AsyncSession = Depends(get_db)):
     try:
@@ -116,19 +246,49 @@ async def update_lote(lot_id: uuid.UUID, data: LoteUpdate, db: AsyncSession = De
 
 
 @lotes_router.get("/{lot_id}", response_model=LoteRead)
-async def get_lote(lot_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_lote(
+    lot_id: uuid.UUID, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+):
     try:
-        return await CateringService.get_lote(db, lot_id)
+        obj = await CateringService.get_lote(db, lot_id)
     except LookupError:
         raise HTTP_LOT_NOT_FOUND
     except Exception:
         raise HTTP_DATABASE_ERROR
+    headers = cache_headers(version_etag("lote", obj.id, obj.version))
+    if not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+    return obj
 
 
 @lotes_router.get("/{lot_id}/detailed", response_model=LoteDetailed)
-async def get_lote_detailed(lot_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_lote_detailed(lot_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_read_db)):
+    # Pollers revalidate with a primary-key probe; items and assignments are only read on a miss.
     try:
-        return await CateringService.get_lote_detailed(db, lot_id)
+        version = await CateringService.get_lote_version(db, lot_id)
+        if version is None:
+            raise HTTP_LOT_NOT_FOUND
+        headers = cache_headers(version_etag("lote-detailed", lot_id, version))
+        if not_modified(request, headers["ETag"]):
+            return not_modified_response(headers)
+        return json_response(await CateringService.get_lote_detailed(db, lot_id), headers=headers)
+    except HTTPException:
+        raise
+    except LookupError:
+        raise HTTP_LOT_NOT_FOUND
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@lotes_router.get("/{lot_id}/stock", response_model=LotStockAt)
+async def get_lote_stock_at(
+    lot_id: uuid.UUID,
+    at: Optional[datetime] = Query(None, description="Point in time; defaults to now, pending movements included"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        return await CateringService.get_lote_stock_at(db, lot_id, at)
     except LookupError:
         raise HTTP_LOT_NOT_FOUND
     except Exception:
@@ -146,12 +306,23 @@ async def delete_lote(lot_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
 
 
 @lotes_router.get("", response_model=List[LoteRead])
-async def list_lotes(db: AsyncSession = Depends(get_db)):
+async def list_lotes(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description=f"Cursor returned in the {NEXT_CURSOR_HEADER} header"),
+    format: ListFormat = Query("json", description="ndjson streams every row from `after` onwards"),
+    db: AsyncSession = Depends(get_read_db),
+    sessions: async_sessionmaker = Depends(get_read_sessionmaker),
+):
     try:
-        res = await db.execute(select(Lote))
-        return list(res.scalars().all())
+        if format == "ndjson":
+            return ndjson_rows_response(keyset(select(*LOTE_COLUMNS), Lote, after), sessions)
+        items, next_cursor, etag = await CateringService.list_lotes_page(db, limit=limit, after=after)
+    except ValueError:
+        raise HTTP_INVALID_CURSOR
     except Exception:
         raise HTTP_DATABASE_ERROR
+    return _page_response(request, items, next_cursor, etag)
 
 
 @lot_items_router.post("", response_model=LoteProductRead, status_code=status.HTTP_201_CREATED)
@@ -172,6 +343,78 @@ async def add_or_increment_item(data: LoteProductCreate, db: AsyncSession = Depe
         raise HTTP_DATABASE_ERROR
 
 
+@lot_items_router.post("/movements", response_model=List[StockMovementRead], status_code=status.HTTP_201_CREATED)
+async def append_stock_movements(data: StockMovementBatch, db: AsyncSession = Depends(get_db)):
+    try:
+        return await CateringService.append_stock_movements(db, data.movements)
+    except LookupError as e:
+        if "product" in str(e).lower():
+            raise HTTP_INVALID_PRODUCT
+        raise HTTP_LOT_NOT_FOUND
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+_LOT_ITEM_ROW_SCHEMA = {
+    "type": "object",
+    "required": ["lot_id", "product_id", "quantity"],
+    "properties": {
+        "lot_id": {"type": "string", "format": "uuid"},
+        "product_id": {"type": "string", "format": "uuid"},
+        "quantity": {"type": "integer", "minimum": 0},
+        "expiration_date": {"type": "string", "format": "date"},
+        "certification_date": {"type": "string", "format": "date"},
+    },
+}
+
+
+@lot_items_router.post(
+    "/bulk",
+    response_model=BulkLotItemsResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MEDIA_TYPE: {"schema": {"type": "array", "items": _LOT_ITEM_ROW_SCHEMA}},
+                NDJSON_MEDIA_TYPES[0]: {"schema": _LOT_ITEM_ROW_SCHEMA},
+                CSV_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_add_or_increment_items(request: Request, db: AsyncSession = Depends(get_db)):
+    media_type = request.headers.get("content-type", JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    if media_type not in (JSON_MEDIA_TYPE, CSV_MEDIA_TYPE, *NDJSON_MEDIA_TYPES):
+        raise HTTP_UNSUPPORTED_MEDIA_TYPE
+    try:
+        reader = LotItemRowReader(media_type, request.stream())
+        return await CateringService.bulk_add_or_increment_lote_products(db, reader)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTP_INVALID_BULK_BODY
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@lot_items_router.get("/expiring", response_model=ExpiringStockReport)
+async def expiring_stock(
+    start: date = Query(..., description="First expiration date included"),
+    end: date = Query(..., description="Last expiration date included"),
+    bucket: ExpiryBucket = Query("day"),
+    product_id: Optional[uuid.UUID] = Query(None),
+    format: ListFormat = Query("json", description="ndjson streams the matching lot items instead of buckets"),
+    db: AsyncSession = Depends(get_read_db),
+    sessions: async_sessionmaker = Depends(get_read_sessionmaker),
+):
+    if end < start:
+        raise HTTP_INVALID_DATE_WINDOW
+    if format == "ndjson":
+        return ndjson_rows_response(expiring_items_query(start, end, product_id), sessions)
+    try:
+        return await CateringService.expiring_stock_report(db, start, end, bucket, product_id)
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
 @lot_items_router.patch("/{lote_product_id}", response_model=LoteProductRead)
 async def update_item(lote_product_id: uuid.UUID, data: LoteProductUpdate, db: AsyncSession = Depends(get_db)):
     try:
@@ -195,9 +438,15 @@ async def remove_item(lote_product_id: uuid.UUID, db: AsyncSession = Depends(get
 
 
 @lotes_router.get("/{lot_id}/items", response_model=List[LoteProductRead])
-async def list_items(lot_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def list_items(lot_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_read_db)):
     try:
-        return await CateringService.list_lote_products(db, lot_id)
+        version = await CateringService.get_lote_version(db, lot_id)
+        if version is None:
+            return json_response([])
+        headers = cache_headers(version_etag("lote-items", lot_id, version))
+        if not_modified(request, headers["ETag"]):
+            return not_modified_response(headers)
+        return json_response(await CateringService.list_lote_products(db, lot_id), headers=headers)
     except Exception:
         raise HTTP_DATABASE_ERROR
 
@@ -212,6 +461,24 @@ async def create_assignment(data: AssignmentCreate, db: AsyncSession = Depends(g
         raise HTTP_DATABASE_ERROR
 
 
+@assignments_router.post("/allocate", response_model=AllocationResponse)
+async def allocate_assignments(data: AllocationRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        return await CateringService.allocate_fefo(db, data)
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@assignments_router.post("/transitions", response_model=AssignmentBulkTransitionResponse)
+async def transition_assignments(data: AssignmentBulkTransition, db: AsyncSession = Depends(get_db)):
+    try:
+        return await CateringService.transition_assignments(db, data)
+    except ValueError:
+        raise HTTP_INVALID_TRANSITION
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
 @assignments_router.patch("/{assignment_id}", response_model=AssignmentRead)
 async def update_assignment(assignment_id: uuid.UUID, data: AssignmentUpdate, db: AsyncSession = Depends(get_db)):
     try:
@@ -223,7 +490,7 @@ async def update_assignment(assignment_id: uuid.UUID, data: AssignmentUpdate, db
 
 
 @assignments_router.get("/{assignment_id}", response_model=AssignmentRead)
-async def get_assignment(assignment_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_assignment(assignment_id: uuid.UUID, db: AsyncSession = Depends(get_read_db)):
     try:
         obj = await CateringService.get_assignment(db, assignment_id)
         return obj
@@ -254,3 +521,103 @@ async def upsert_assignment_for_lote(
     except Exception:
         raise HTTP_DATABASE_ERROR
 
+
+@manifests_router.post("/batch", response_model=ManifestBatchResponse)
+async def get_flight_manifests(data: ManifestBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    try:
+        manifests = await CateringService.get_flight_manifests(db, data.flights, data.status)
+        return ManifestBatchResponse(manifests=manifests)
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@manifests_router.get("/{flight}", response_model=FlightManifest)
+async def get_flight_manifest(
+    flight: str,
+    status: Optional[AssignmentStatus] = Query(None, description="Only lots whose assignment has this status"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        manifests = await CateringService.get_flight_manifests(db, [flight], status)
+        return manifests[0]
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def _feed_filter(
+    lot_id: List[uuid.UUID] = Query([], description="Only changes to these lots"),
+    product_id: List[uuid.UUID] = Query([], description="Only changes to these products"),
+    flight: List[str] = Query([], description="Only assignment changes for these flights"),
+) -> FeedFilter:
+    return FeedFilter.build(lot_ids=lot_id, product_ids=product_id, flights=flight)
+
+
+async def _iter_sse(request: Request, feed_filter: FeedFilter) -> AsyncIterator[bytes]:
+    subscriber = change_feed.subscribe(feed_filter)
+    try:
+        yield b"retry: 3000\n\n"
+        while not await request.is_disconnected():
+            batch = await subscriber.next_batch(settings.feed_heartbeat_seconds)
+            if not batch:
+                yield b": ping\n\n"
+                continue
+            yield b"".join(
+                b"event: " + (b"resync" if event["op"] == "resync" else b"change") + b"\n"
+                b"data: " + dumps(event) + b"\n\n"
+                for event in batch
+            )
+    finally:
+        change_feed.unsubscribe(subscriber)
+
+
+@feed_router.get("/events", response_class=StreamingResponse)
+async def feed_events(request: Request, feed_filter: FeedFilter = Depends(_feed_filter)):
+    return StreamingResponse(
+        _iter_sse(request, feed_filter),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@feed_router.websocket("/ws")
+async def feed_websocket(websocket: WebSocket, feed_filter: FeedFilter = Depends(_feed_filter)):
+    await websocket.accept()
+    subscriber: FeedSubscriber = change_feed.subscribe(feed_filter)
+    try:
+        while True:
+            batch = await subscriber.next_batch(settings.feed_heartbeat_seconds)
+            for event in batch or [{"op": "ping"}]:
+                await websocket.send_bytes(dumps(event))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        change_feed.unsubscribe(subscriber)
+
+
+@feed_router.get("/stats")
+async def feed_stats():
+    return change_feed.stats()
+
+
+@search_router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=120, description="Code prefix, or free text in fuzzy mode"),
+    mode: SearchMode = Query("prefix", description="prefix: codes starting with q; fuzzy: trigram similarity"),
+    kind: List[SearchKind] = Query(list(SEARCH_KINDS)),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        return await CateringService.search(db, q, mode, kind, limit)
+    except ValueError:
+        raise HTTP_INVALID_SEARCH_QUERY
+    except Exception:
+        raise HTTP_DATABASE_ERROR
+
+
+@search_router.get("/stats")
+async def search_stats():
+    return code_trie.stats()
@@ -1,8 +1,8 @@
 from __future__ import annotations
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Literal
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -89,3 +89,212 @@ class LoteDetailed(LoteRead):
 class ProductWithLots(ProductRead):
     lot_items: List[LoteProductRead]
     model_config = dict(from_attributes=True)
+
+
+MAX_BATCH_IDS = 1000
+
+class ProductStockRead(BaseModel):
+    product_id: UUID
+    total_quantity: int = 0
+    lot_count: int = 0
+    earliest_expiration: Optional[date] = None
+    quantity_by_status: Dict[str, int] = Field(default_factory=dict)
+    model_config = dict(from_attributes=True)
+
+class ProductStockBatchRequest(BaseModel):
+    product_ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+class ProductStockBatchResponse(BaseModel):
+    stock: List[ProductStockRead]
+    missing_ids: List[UUID]
+
+
+class BulkLotItemStatus(str, Enum):
+    APPLIED = "applied"
+    LOT_NOT_FOUND = "lot_not_found"
+    INVALID_PRODUCT = "invalid_product"
+    INVALID_ROW = "invalid_row"
+
+class BulkLotItemResult(BaseModel):
+    row: int
+    status: BulkLotItemStatus
+    lote_product_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class BulkLotItemsResponse(BaseModel):
+    received: int
+    applied: int
+    rejected: int
+    results: List[BulkLotItemResult]
+
+
+class FlightDemand(BaseModel):
+    flight: str = Field(..., min_length=1, max_length=40)
+    products: Dict[str, int]  # product_code -> quantity
+
+class AllocationRequest(BaseModel):
+    flights: List[FlightDemand] = Field(..., min_length=1)
+    as_of: Optional[date] = None
+    status: AssignmentStatus = AssignmentStatus.DRAFT
+    dry_run: bool = False
+
+class AllocatedLot(BaseModel):
+    lot_id: UUID
+    lote_code: str
+    earliest_expiration: Optional[date] = None
+    quantities: Dict[str, int]
+
+class FlightAllocation(BaseModel):
+    flight: str
+    lots: List[AllocatedLot]
+    shortfall: Dict[str, int]
+
+class AllocationResponse(BaseModel):
+    flights: List[FlightAllocation]
+    assignments_created: int
+
+
+class ExpiringStockBucket(BaseModel):
+    product_id: UUID
+    product_code: str
+    bucket_start: date
+    quantity: int
+    lot_count: int
+
+class ExpiringStockReport(BaseModel):
+    start: date
+    end: date
+    bucket: str
+    buckets: List[ExpiringStockBucket]
+
+
+class LoteDetailedBatchRequest(BaseModel):
+    lot_ids: List[UUID] = Field(default_factory=list, max_length=MAX_BATCH_IDS)
+    lote_codes: List[str] = Field(default_factory=list, max_length=MAX_BATCH_IDS)
+
+    @model_validator(mode="after")
+    def _bounded(self):
+        requested = len(self.lot_ids) + len(self.lote_codes)
+        if not requested:
+            raise ValueError("Provide at least one lot_id or lote_code")
+        if requested > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} lot_ids and lote_codes in total")
+        return self
+
+class LoteDetailedBatchResponse(BaseModel):
+    lotes: List[LoteDetailed]
+    missing_ids: List[UUID]
+    missing_codes: List[str]
+
+
+class AssignmentBulkTransition(BaseModel):
+    from_status: AssignmentStatus
+    to_status: AssignmentStatus
+    ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=MAX_BATCH_IDS)
+    flight_assigned: Optional[str] = None
+    lot_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self):
+        selectors = [self.ids, self.flight_assigned, self.lot_id]
+        if sum(s is not None for s in selectors) != 1:
+            raise ValueError("Provide exactly one of ids, flight_assigned or lot_id")
+        return self
+
+class AssignmentTransitionOutcome(str, Enum):
+    TRANSITIONED = "transitioned"
+    STATUS_MISMATCH = "status_mismatch"
+    NOT_FOUND = "not_found"
+
+class AssignmentTransitionResult(BaseModel):
+    id: UUID
+    outcome: AssignmentTransitionOutcome
+    status: Optional[AssignmentStatus] = None
+
+class AssignmentBulkTransitionResponse(BaseModel):
+    from_status: AssignmentStatus
+    to_status: AssignmentStatus
+    transitioned: int
+    results: List[AssignmentTransitionResult]
+
+
+class ManifestLot(BaseModel):
+    lot_id: UUID
+    lote_code: str
+    status: AssignmentStatus
+    quantity: int
+    expiration_date: Optional[date] = None
+
+class ManifestLine(BaseModel):
+    product_id: UUID
+    product_code: str
+    product_name: str
+    total_quantity: int
+    earliest_expiration: Optional[date] = None
+    lots: List[ManifestLot]
+
+class FlightManifest(BaseModel):
+    flight: str
+    total_quantity: int
+    lot_count: int
+    lines: List[ManifestLine]
+
+class ManifestBatchRequest(BaseModel):
+    flights: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+    status: Optional[AssignmentStatus] = None
+
+class ManifestBatchResponse(BaseModel):
+    manifests: List[FlightManifest]
+
+
+class StockMovementReason(str, Enum):
+    RECEIPT = "receipt"
+    CONSUMPTION = "consumption"
+    ADJUSTMENT = "adjustment"
+
+class StockMovementCreate(BaseModel):
+    lot_id: UUID
+    product_id: UUID
+    delta: int = Field(..., description="Signed quantity change; must not be zero")
+    reason: StockMovementReason = StockMovementReason.ADJUSTMENT
+
+    @model_validator(mode="after")
+    def _non_zero(self):
+        if self.delta == 0:
+            raise ValueError("delta must not be zero")
+        return self
+
+class StockMovementBatch(BaseModel):
+    movements: List[StockMovementCreate] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+class StockMovementRead(BaseModel):
+    id: int
+    lot_id: UUID
+    product_id: UUID
+    delta: int
+    reason: str
+    applied: bool
+    created_at: datetime
+
+class LotStockAtItem(BaseModel):
+    product_id: UUID
+    quantity: int
+
+class LotStockAt(BaseModel):
+    lot_id: UUID
+    at: datetime
+    items: List[LotStockAtItem]
+
+
+class SearchHit(BaseModel):
+    kind: Literal["product", "lote"]
+    id: UUID
+    code: str
+    name: Optional[str] = None
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    mode: Literal["prefix", "fuzzy"]
+    source: Literal["trie", "database"]
+    hits: List[SearchHit]
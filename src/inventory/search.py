@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Literal, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Float, Select, bindparam, cast, func, literal, literal_column, select, union_all
+
+from src.database import AsyncReadSessionLocal, AsyncSessionLocal
+from src.settings import settings
+
+from .models import Lote, Product
+
+logger = logging.getLogger(__name__)
+
+SearchMode = Literal["prefix", "fuzzy"]
+SearchKind = Literal["product", "lote"]
+SEARCH_KINDS: Tuple[SearchKind, ...] = ("product", "lote")
+
+
+LIKE_ESCAPE = "/"
+
+
+def _like_prefix(query: str) -> str:
+    escaped = query.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return escaped + "%"
+
+
+def _prefix_select(kind: SearchKind, query: str) -> Select:
+    # The pattern is rendered inline (literal_execute) so every plan is a
+    # custom one and can use the text_pattern_ops prefix index; a generic plan
+    # over `LIKE $1` cannot.
+    pattern = bindparam(f"{kind}_prefix", _like_prefix(query), literal_execute=True)
+    if kind == "product":
+        code, name, model = Product.product_code, Product.product_name, Product
+    else:
+        code, name, model = Lote.lote_code, literal_column("NULL"), Lote
+    score = literal(float(len(query))) / cast(func.length(code), Float)
+    return (
+        select(literal(kind).label("kind"), model.id, code.label("code"), name.label("name"), score.label("score"))
+        .where(func.lower(code).like(pattern, escape=LIKE_ESCAPE))
+    )
+
+
+def _fuzzy_select(kind: SearchKind, query: str) -> Select:
+    # `q <% col` is word_similarity above pg_trgm.word_similarity_threshold,
+    # served by the gin_trgm_ops indexes.
+    if kind == "product":
+        code_score = func.word_similarity(query, Product.product_code)
+        name_score = func.word_similarity(query, Product.product_name)
+        return (
+            select(
+                literal(kind).label("kind"),
+                Product.id,
+                Product.product_code.label("code"),
+                Product.product_name.label("name"),
+                func.greatest(code_score, name_score).label("score"),
+            )
+            .where(
+                literal(query).op("<%")(Product.product_code)
+                | literal(query).op("<%")(Product.product_name)
+            )
+        )
+    return (
+        select(
+            literal(kind).label("kind"),
+            Lote.id,
+            Lote.lote_code.label("code"),
+            literal_column("NULL").label("name"),
+            func.word_similarity(query, Lote.lote_code).label("score"),
+        )
+        .where(literal(query).op("<%")(Lote.lote_code))
+    )
+
+
+def search_query(query: str, mode: SearchMode, kinds: Sequence[SearchKind], limit: int) -> Select:
+    build = _prefix_select if mode == "prefix" else _fuzzy_select
+    # Each branch is limited on its own so no side is fully sorted for nothing.
+    branches = [build(kind, query).order_by(literal_column("score").desc()).limit(limit) for kind in kinds]
+    combined = union_all(*branches).subquery("hits")
+    return (
+        select(combined)
+        .order_by(combined.c.score.desc(), func.length(combined.c.code), combined.c.code)
+        .limit(limit)
+    )
+
+
+@dataclass(frozen=True)
+class TrieEntry:
+    kind: SearchKind
+    id: uuid.UUID
+    code: str
+    name: Optional[str]
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: List[TrieEntry] = []
+
+
+class CodeTrie:
+    """
+    Case-insensitive prefix trie over product and lot codes. Lookups walk the
+    prefix, then go breadth first so shorter (closer) codes come out first.
+    """
+
+    def __init__(self, entries: Iterable[TrieEntry] = ()):
+        self._root = _Node()
+        self._entries: Dict[Tuple[SearchKind, uuid.UUID], TrieEntry] = {}
+        for entry in entries:
+            self.add(entry)
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: TrieEntry) -> None:
+        """Inserts `entry`, replacing the one already held for its (kind, id)."""
+        self.remove(entry.kind, entry.id)
+        node = self._root
+        for char in entry.code.lower():
+            node = node.children.setdefault(char, _Node())
+        node.entries.append(entry)
+        self._entries[(entry.kind, entry.id)] = entry
+
+    def remove(self, kind: SearchKind, entry_id: uuid.UUID) -> None:
+        entry = self._entries.pop((kind, entry_id), None)
+        if entry is None:
+            return
+        code = entry.code.lower()
+        path = [self._root]
+        for char in code:
+            path.append(path[-1].children[char])
+        path[-1].entries.remove(entry)
+        # Prune the branch back up to the first node still in use.
+        for depth in range(len(code), 0, -1):
+            if path[depth].entries or path[depth].children:
+                break
+            del path[depth - 1].children[code[depth - 1]]
+
+    def complete(self, prefix: str, limit: int, kinds: Sequence[SearchKind] = SEARCH_KINDS) -> List[TrieEntry]:
+        node: Optional[_Node] = self._root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found: List[TrieEntry] = []
+        queue: Deque[_Node] = deque([node])
+        while queue and len(found) < limit:
+            current = queue.popleft()
+            found.extend(entry for entry in current.entries if entry.kind in kinds)
+            queue.extend(current.children[char] for char in sorted(current.children))
+        return found[:limit]
+
+
+class CodeTrieIndex:
+    """
+    Per-worker trie kept current from inventory_changes: the product and lot
+    ids in each NOTIFY are re-read and patched in every `interval` seconds.
+    The full rebuild only runs at start-up and after the LISTEN connection
+    reconnects, when NOTIFYs may have been lost. Until the first build
+    finishes, prefix searches fall back to SQL.
+    """
+
+    def __init__(self, interval: float, enabled: bool = True):
+        self.interval = interval
+        self.enabled = enabled
+        self.trie: Optional[CodeTrie] = None
+        self.rebuilds = 0
+        self.updates = 0
+        self._dirty = True
+        self._pending: Dict[SearchKind, Set[str]] = {kind: set() for kind in SEARCH_KINDS}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.trie is not None
+
+    def mark_dirty(self, _message: Any = None) -> None:
+        self._dirty = True
+
+    def on_change(self, message: Dict[str, Any]) -> None:
+        """Handler for inventory_changes: only product and lot rows carry codes."""
+        table = message.get("table")
+        if table == "products":
+            kind, row_id = "product", message.get("product_id")
+        elif table == "lotes":
+            kind, row_id = "lote", message.get("lot_id")
+        else:
+            return
+        if row_id is None:
+            self._dirty = True
+        else:
+            self._pending[kind].add(row_id)
+
+    async def rebuild(self) -> None:
+        # Pending ids are kept: the replica may not have them yet, and the
+        # primary re-read after the rebuild is idempotent.
+        self._dirty = False
+        stmt = union_all(
+            select(literal("product").label("kind"), Product.id, Product.product_code, Product.product_name),
+            select(literal("lote"), Lote.id, Lote.lote_code, literal_column("NULL")),
+        )
+        async with AsyncReadSessionLocal() as session:
+            res = await session.execute(stmt)
+            self.trie = CodeTrie(TrieEntry(*row) for row in res)
+        self.rebuilds += 1
+
+    async def apply_pending(self) -> None:
+        """Re-reads the changed ids; the ones no longer found are removed."""
+        pending = {kind: [uuid.UUID(i) for i in ids] for kind, ids in self._pending.items() if ids}
+        self._pending = {kind: set() for kind in SEARCH_KINDS}
+        branches = []
+        if "product" in pending:
+            branches.append(
+                select(literal("product").label("kind"), Product.id, Product.product_code, Product.product_name)
+                .where(Product.id.in_(pending["product"]))
+            )
+        if "lote" in pending:
+            branches.append(
+                select(literal("lote").label("kind"), Lote.id, Lote.lote_code, literal_column("NULL"))
+                .where(Lote.id.in_(pending["lote"]))
+            )
+        try:
+            # The NOTIFY comes from the primary; a lagging replica could still
+            # return the old code, and nothing would correct it afterwards.
+            async with AsyncSessionLocal() as session:
+                res = await session.execute(union_all(*branches))
+                found = [TrieEntry(*row) for row in res]
+        except Exception:
+            for kind, ids in pending.items():
+                self._pending[kind].update(map(str, ids))
+            raise
+        for kind, ids in pending.items():
+            for row_id in ids:
+                self.trie.remove(kind, row_id)
+        for entry in found:
+            self.trie.add(entry)
+        self.updates += 1
+
+    async def _run(self) -> None:
+        while True:
+            if self._dirty:
+                try:
+                    await self.rebuild()
+                except Exception:
+                    self._dirty = True
+                    logger.exception("Search trie rebuild failed")
+            elif self.trie is not None and any(self._pending.values()):
+                try:
+                    await self.apply_pending()
+                except Exception:
+                    logger.exception("Search trie update failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="search-trie")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "size": self.trie.size if self.trie else 0,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "pending": sum(len(ids) for ids in self._pending.values()),
+        }
+
+
+code_trie = CodeTrieIndex(
+    interval=settings.search_trie_refresh_seconds,
+    enabled=settings.search_trie_enabled,
+)
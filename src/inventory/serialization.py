@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, literal_column
+
+from .models import Assignment, Lote, LoteProduct, Product
+
+# Column sets matching the *Read schemas field for field. Rows selected with
+# them are trusted DB output and are dumped as-is, without a Pydantic round trip.
+PRODUCT_COLUMNS = (Product.id, Product.product_code, Product.product_name)
+LOTE_COLUMNS = (Lote.id, Lote.lote_code)
+LOTE_PRODUCT_COLUMNS = (
+    LoteProduct.id, LoteProduct.lot_id, LoteProduct.product_id,
+    LoteProduct.quantity, LoteProduct.expiration_date, LoteProduct.certification_date,
+)
+ASSIGNMENT_COLUMNS = (Assignment.id, Assignment.lot_id, Assignment.flight_assigned, Assignment.status)
+
+
+def json_object(**fields: Any) -> Any:
+    """
+    json_build_object() with the keys inlined: as bound parameters they reach
+    Postgres untyped and the variadic "any" signature rejects them.
+    """
+    args: List[Any] = []
+    for key, value in fields.items():
+        args += [literal_column(f"'{key}'"), value]
+    return func.json_build_object(*args)
+
+
+def column_keys(columns: Sequence[Any]) -> List[str]:
+    return [column.key for column in columns]
+
+
+def record(row: Any, keys: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Plain dict of a Core row, optionally limited to `keys` (e.g. to drop keyset columns)."""
+    mapping = row._mapping
+    if keys is None:
+        return dict(mapping)
+    return {key: mapping[key] for key in keys}
+
+
+def records(rows: Iterable[Any], keys: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    return [record(row, keys) for row in rows]
+
+
+def dumps(content: Any) -> bytes:
+    # orjson handles UUID, date, datetime and Enum natively.
+    return orjson.dumps(content)
+
+
+def dumps_line(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Returning a Response skips FastAPI's response_model validation and
+    jsonable_encoder pass; the route keeps its response_model for OpenAPI.
+    """
+    return ORJSONResponse(content, headers=headers)
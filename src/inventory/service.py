@@ -1,88 +1,288 @@
 from __future__ import annotations
 
 import uuid
-from typing import List, Optional
-from sqlalchemy import select, and_
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from sqlalchemy import DateTime, Text, cast, select, insert, update, delete, exists, literal, literal_column, func, text, or_
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from .models import Product, Lote, LoteProduct, Assignment, AssignmentStatus
+from src.database import AsyncSessionLocal, engine
+from .models import (
+    Product, Lote, LoteProduct, Assignment, AssignmentStatus, ProductStock, StockMovement,
+    ASSIGNMENT_TRANSITIONS,
+)
+from .allocation import FefoIndex, eligible_stock_query
+from .cache import PRODUCT_CATALOG_CHANNEL, product_cache
+from .ingest import STAGING_COLUMNS, LotItemRowReader
+from .http_cache import composite_version, page_etag
+from .ledger import LOT_STOCK_AT, MOVEMENT_COLUMNS
+from .manifests import build_manifests, flight_manifest_query
+from .pagination import keyset_page, split_page
+from .reports import ExpiryBucket, expiry_buckets_query
+from .search import SearchKind, SearchMode, code_trie, search_query
+from .serialization import (
+    ASSIGNMENT_COLUMNS, LOTE_COLUMNS, LOTE_PRODUCT_COLUMNS, PRODUCT_COLUMNS,
+    column_keys, json_object, record, records,
+)
 from .schemas import (
     ProductCreate, ProductUpdate,
     LoteCreate, LoteUpdate,
     LoteProductCreate, LoteProductUpdate,
     AssignmentCreate, AssignmentUpdate,
+    ProductRead, ProductStockRead, LoteRead, LoteProductRead, AssignmentRead,
+    BulkLotItemResult, BulkLotItemStatus, BulkLotItemsResponse,
+    AllocationRequest, AllocationResponse,
+    ExpiringStockBucket, ExpiringStockReport,
+    AssignmentBulkTransition, AssignmentBulkTransitionResponse,
+    AssignmentTransitionOutcome, AssignmentTransitionResult,
+    FlightManifest,
+    StockMovementCreate, StockMovementRead, LotStockAt, LotStockAtItem,
+    SearchHit, SearchResponse,
+)
+
+_CREATE_LOT_ITEMS_STAGING = text(
+    """
+    CREATE TEMP TABLE lot_items_staging (
+        row_no integer NOT NULL,
+        lot_id uuid NOT NULL,
+        product_id uuid NOT NULL,
+        quantity integer NOT NULL,
+        expiration_date date,
+        certification_date date
+    ) ON COMMIT DROP
+    """
 )
 
+# Duplicated pairs inside one batch are summed first (ON CONFLICT cannot touch
+# the same row twice); the latest non-null dates win, as in the single-row path.
+# With app.bulk set the ledger trigger stays out of it: each merged lot item
+# gets one applied 'bulk_import' movement for the batch total instead.
+_MERGE_LOT_ITEMS_STAGING = text(
+    """
+    WITH batch AS (
+        SELECT s.lot_id,
+               s.product_id,
+               sum(s.quantity) AS quantity,
+               (array_agg(s.expiration_date ORDER BY s.row_no DESC)
+                    FILTER (WHERE s.expiration_date IS NOT NULL))[1] AS expiration_date,
+               (array_agg(s.certification_date ORDER BY s.row_no DESC)
+                    FILTER (WHERE s.certification_date IS NOT NULL))[1] AS certification_date
+        FROM lot_items_staging s
+        JOIN lotes l ON l.id = s.lot_id
+        JOIN products p ON p.id = s.product_id
+        GROUP BY s.lot_id, s.product_id
+    ),
+    merged AS (
+        INSERT INTO lote_products (lot_id, product_id, quantity, expiration_date, certification_date)
+        SELECT lot_id, product_id, quantity, expiration_date, certification_date
+        FROM batch
+        ON CONFLICT ON CONSTRAINT uq_lote_products_lot_id_product_id DO UPDATE
+        SET quantity = lote_products.quantity + excluded.quantity,
+            expiration_date = coalesce(excluded.expiration_date, lote_products.expiration_date),
+            certification_date = coalesce(excluded.certification_date, lote_products.certification_date),
+            updated_at = now()
+        RETURNING id, lot_id, product_id
+    ),
+    logged AS (
+        INSERT INTO stock_movements (lot_id, product_id, delta, reason, applied)
+        SELECT lot_id, product_id, quantity, 'bulk_import', true
+        FROM batch WHERE quantity <> 0
+    )
+    SELECT s.row_no,
+           m.id AS lote_product_id,
+           l.id IS NOT NULL AS lot_exists,
+           p.id IS NOT NULL AS product_exists
+    FROM lot_items_staging s
+    LEFT JOIN lotes l ON l.id = s.lot_id
+    LEFT JOIN products p ON p.id = s.product_id
+    LEFT JOIN merged m ON m.lot_id = s.lot_id AND m.product_id = s.product_id
+    """
+)
+
+
+def _changes(data: BaseModel) -> dict:
+    # Update schemas use None for "leave as is".
+    return {key: value for key, value in data.model_dump().items() if value is not None}
+
+
+def _product_notify():
+    # Evaluated per RETURNING row so the NOTIFY rides on the write itself.
+    payload = json_object(id=Product.id, product_code=Product.product_code)
+    return func.pg_notify(PRODUCT_CATALOG_CHANNEL, payload.cast(Text)).label("notified")
+
+
+def _lot_children_fingerprint(model: type, lot_id: uuid.UUID):
+    # md5 of the lot's (id, version) pairs: changes on any insert, update or delete.
+    pair = cast(model.id, Text) + ":" + cast(model.version, Text)
+    return (
+        select(func.md5(func.string_agg(pair, aggregate_order_by(literal_column("','"), model.id))))
+        .where(model.lot_id == lot_id)
+        .scalar_subquery()
+    )
+
+
+@asynccontextmanager
+async def _catalog_session(db: AsyncSession):
+    # Cache misses load from the primary: a replica row can predate the
+    # invalidation a write just sent and would then stay cached for the TTL.
+    if db.bind is engine:
+        yield db
+    else:
+        async with AsyncSessionLocal() as primary:
+            yield primary
+
+
+def _violated_constraint(exc: IntegrityError) -> str:
+    # asyncpg exposes the constraint name on the wrapped driver error.
+    orig = getattr(exc, "orig", None)
+    name = getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    return name or str(orig)
+
+
+def _missing_reference(exc: IntegrityError) -> LookupError:
+    constraint = _violated_constraint(exc)
+    if "product_id_fkey" in constraint:
+        return LookupError("Product not found")
+    if "lot_id_fkey" in constraint:
+        return LookupError("Lote not found")
+    raise exc
+
 
 class CateringService:
 
     @staticmethod
-    async def create_product(db: AsyncSession, data: ProductCreate) -> Product:
-        res = await db.execute(select(Product).where(Product.product_code == data.product_code))
-        if res.scalar_one_or_none():
+    async def create_product(db: AsyncSession, data: ProductCreate) -> ProductRead:
+        source = select(literal(data.product_code), literal(data.product_name)).where(
+            ~exists().where(Product.product_code == data.product_code)
+        )
+        stmt = (
+            insert(Product.__table__)
+            .from_select(["product_code", "product_name"], source)
+            .returning(*PRODUCT_COLUMNS, _product_notify())
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise ValueError("product_code already exists")
-        obj = Product(product_code=data.product_code, product_name=data.product_name)
-        db.add(obj)
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        product_cache.invalidate(product_code=row.product_code)
+        return ProductRead.model_validate(row._mapping)
 
     @staticmethod
-    async def update_product(db: AsyncSession, product_id: uuid.UUID, data: ProductUpdate) -> Product:
-        obj = await db.get(Product, product_id)
-        if not obj:
+    async def update_product(db: AsyncSession, product_id: uuid.UUID, data: ProductUpdate) -> ProductRead:
+        stmt = (
+            update(Product.__table__)
+            .where(Product.id == product_id)
+            .values(**_changes(data), updated_at=func.now())
+            .returning(*PRODUCT_COLUMNS, _product_notify())
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise LookupError("Product not found")
-        if data.product_code is not None:
-            obj.product_code = data.product_code
-        if data.product_name is not None:
-            obj.product_name = data.product_name
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        # Local workers drop the entry right away; others hear the NOTIFY on commit.
+        product_cache.invalidate(product_id=row.id)
+        return ProductRead.model_validate(row._mapping)
 
     @staticmethod
     async def delete_product(db: AsyncSession, product_id: uuid.UUID) -> None:
-        obj = await db.get(Product, product_id)
-        if not obj:
+        stmt = delete(Product.__table__).where(Product.id == product_id).returning(Product.id, _product_notify())
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise LookupError("Product not found")
-        await db.delete(obj)
         await db.commit()
+        product_cache.invalidate(product_id=row.id)
 
     @staticmethod
-    async def get_product(db: AsyncSession, product_id: uuid.UUID) -> Product:
-        obj = await db.get(Product, product_id)
-        if not obj:
+    async def get_product(db: AsyncSession, product_id: uuid.UUID) -> ProductRead:
+        cached = product_cache.get(product_id)
+        if cached is not None:
+            return cached
+        async with _catalog_session(db) as source:
+            obj = await source.get(Product, product_id)
+            if not obj:
+                raise LookupError("Product not found")
+            return product_cache.put(obj)
+
+    @staticmethod
+    async def list_products_page(
+        db: AsyncSession, *, limit: int, after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str], str]:
+        stmt = select(*PRODUCT_COLUMNS, Product.created_at, Product.version)
+        res = await db.execute(keyset_page(stmt, Product, limit=limit, after=after))
+        rows, next_cursor = split_page(res.all(), limit)
+        return records(rows, column_keys(PRODUCT_COLUMNS)), next_cursor, page_etag(rows, next_cursor)
+
+    @staticmethod
+    async def get_product_stock_many(
+        db: AsyncSession, product_ids: List[uuid.UUID]
+    ) -> Tuple[List[ProductStockRead], List[uuid.UUID]]:
+        # product_stock is kept current by triggers; products without items have no
+        # summary row and report zeros.
+        q = (
+            select(
+                Product.id.label("product_id"),
+                ProductStock.total_quantity,
+                ProductStock.lot_count,
+                ProductStock.earliest_expiration,
+                ProductStock.quantity_by_status,
+            )
+            .outerjoin(ProductStock, ProductStock.product_id == Product.id)
+            .where(Product.id.in_(product_ids))
+        )
+        res = await db.execute(q)
+        stock = [
+            ProductStockRead(
+                product_id=row.product_id,
+                total_quantity=row.total_quantity or 0,
+                lot_count=row.lot_count or 0,
+                earliest_expiration=row.earliest_expiration,
+                quantity_by_status=row.quantity_by_status or {},
+            )
+            for row in res.all()
+        ]
+        found = {s.product_id for s in stock}
+        return stock, [pid for pid in dict.fromkeys(product_ids) if pid not in found]
+
+    @staticmethod
+    async def get_product_stock(db: AsyncSession, product_id: uuid.UUID) -> ProductStockRead:
+        stock, _ = await CateringService.get_product_stock_many(db, [product_id])
+        if not stock:
             raise LookupError("Product not found")
-        return obj
+        return stock[0]
 
     @staticmethod
-    async def create_lote(db: AsyncSession, data: LoteCreate) -> Lote:
-        res = await db.execute(select(Lote).where(Lote.lote_code == data.lote_code))
-        if res.scalar_one_or_none():
+    async def create_lote(db: AsyncSession, data: LoteCreate) -> LoteRead:
+        source = select(literal(data.lote_code)).where(~exists().where(Lote.lote_code == data.lote_code))
+        stmt = insert(Lote.__table__).from_select(["lote_code"], source).returning(*LOTE_COLUMNS)
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise ValueError("lote_code already exists")
-        obj = Lote(lote_code=data.lote_code)
-        db.add(obj)
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        return LoteRead.model_validate(row._mapping)
 
     @staticmethod
-    async def update_lote(db: AsyncSession, lot_id: uuid.UUID, data: LoteUpdate) -> Lote:
-        obj = await db.get(Lote, lot_id)
-        if not obj:
+    async def update_lote(db: AsyncSession, lot_id: uuid.UUID, data: LoteUpdate) -> LoteRead:
+        stmt = (
+            update(Lote.__table__)
+            .where(Lote.id == lot_id)
+            .values(**_changes(data), updated_at=func.now())
+            .returning(*LOTE_COLUMNS)
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise LookupError("Lote not found")
-        if data.lote_code is not None:
-            obj.lote_code = data.lote_code
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        return LoteRead.model_validate(row._mapping)
 
     @staticmethod
     async def delete_lote(db: AsyncSession, lot_id: uuid.UUID) -> None:
-        obj = await db.get(Lote, lot_id)
-        if not obj:
+        res = await db.execute(delete(Lote.__table__).where(Lote.id == lot_id).returning(Lote.id))
+        if res.first() is None:
             raise LookupError("Lote not found")
-        await db.delete(obj)
         await db.commit()
 
     @staticmethod
@@ -93,115 +293,228 @@ class CateringService:
         return obj
 
     @staticmethod
-    async def get_lote_detailed(db: AsyncSession, lot_id: uuid.UUID) -> Lote:
-        q = (
-            select(Lote)
-            .where(Lote.id == str(lot_id))
-            .options(
-                selectinload(Lote.items).selectinload(LoteProduct.product),
-                selectinload(Lote.assignments),
-            )
-        )
-        res = await db.execute(q)
-        obj = res.scalar_one_or_none()
-        if not obj:
-            raise LookupError("Lote not found")
-        return obj
+    async def list_lotes_page(
+        db: AsyncSession, *, limit: int, after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str], str]:
+        stmt = select(*LOTE_COLUMNS, Lote.created_at, Lote.version)
+        res = await db.execute(keyset_page(stmt, Lote, limit=limit, after=after))
+        rows, next_cursor = split_page(res.all(), limit)
+        return records(rows, column_keys(LOTE_COLUMNS)), next_cursor, page_etag(rows, next_cursor)
 
     @staticmethod
-    async def add_or_increment_lote_product(db: AsyncSession, data: LoteProductCreate) -> LoteProduct:
-        if not await db.get(Lote, data.lot_id):
+    async def get_lote_version(db: AsyncSession, lot_id: uuid.UUID) -> Optional[str]:
+        # Derived on read so child writes never touch the lotes row.
+        stmt = select(
+            Lote.version, _lot_children_fingerprint(LoteProduct, lot_id), _lot_children_fingerprint(Assignment, lot_id)
+        ).where(Lote.id == lot_id)
+        row = (await db.execute(stmt)).first()
+        return None if row is None else composite_version(*row)
+
+    @staticmethod
+    async def get_lote_detailed(db: AsyncSession, lot_id: uuid.UUID) -> dict:
+        lotes, _, _ = await CateringService.get_lotes_detailed_many(db, lot_ids=[lot_id])
+        if not lotes:
             raise LookupError("Lote not found")
-        if not await db.get(Product, data.product_id):
-            raise LookupError("Product not found")
-        q = select(LoteProduct).where(
-            and_(LoteProduct.lot_id == str(data.lot_id), LoteProduct.product_id == str(data.product_id))
+        return lotes[0]
+
+    @staticmethod
+    async def get_lotes_detailed_many(
+        db: AsyncSession, lot_ids: Sequence[uuid.UUID] = (), lote_codes: Sequence[str] = ()
+    ) -> Tuple[List[dict], List[uuid.UUID], List[str]]:
+        """
+        Plain rows shaped like LoteDetailed, in request order, plus the ids and
+        codes that matched no lot. Always three queries, however many lots are asked for.
+        """
+        lot_ids, lote_codes = list(dict.fromkeys(lot_ids)), list(dict.fromkeys(lote_codes))
+        res = await db.execute(
+            select(*LOTE_COLUMNS).where(or_(Lote.id.in_(lot_ids), Lote.lote_code.in_(lote_codes)))
         )
-        res = await db.execute(q)
-        lp = res.scalar_one_or_none()
-        if lp:
-            lp.quantity += data.quantity
-            lp.expiration_date = data.expiration_date or lp.expiration_date
-            lp.certification_date = data.certification_date or lp.certification_date
-        else:
-            lp = LoteProduct(
-                lot_id=str(data.lot_id),
-                product_id=str(data.product_id),
-                quantity=data.quantity,
-                expiration_date=data.expiration_date,
-                certification_date=data.certification_date,
+        by_id = {row.id: {**record(row), "items": [], "assignments": []} for row in res}
+        if by_id:
+            items = await db.execute(
+                select(*LOTE_PRODUCT_COLUMNS)
+                .where(LoteProduct.lot_id.in_(list(by_id)))
+                .order_by(LoteProduct.lot_id, LoteProduct.id)
             )
-            db.add(lp)
-        await db.commit()
-        await db.refresh(lp)
+            for row in items:
+                by_id[row.lot_id]["items"].append(record(row))
+            assignments = await db.execute(
+                select(*ASSIGNMENT_COLUMNS)
+                .where(Assignment.lot_id.in_(list(by_id)))
+                .order_by(Assignment.lot_id, Assignment.id)
+            )
+            for row in assignments:
+                by_id[row.lot_id]["assignments"].append(record(row))
+
+        by_code = {lote["lote_code"]: lote for lote in by_id.values()}
+        ordered = [by_id[i] for i in lot_ids if i in by_id] + [by_code[c] for c in lote_codes if c in by_code]
+        lotes = list({lote["id"]: lote for lote in ordered}.values())
+        missing_ids = [i for i in lot_ids if i not in by_id]
+        missing_codes = [c for c in lote_codes if c not in by_code]
+        return lotes, missing_ids, missing_codes
+
+    @staticmethod
+    async def add_or_increment_lote_product(db: AsyncSession, data: LoteProductCreate) -> LoteProduct:
+        # Single round trip: the unique (lot_id, product_id) constraint serialises
+        # concurrent increments and the FKs report unknown lots/products.
+        stmt = pg_insert(LoteProduct).values(
+            lot_id=data.lot_id,
+            product_id=data.product_id,
+            quantity=data.quantity,
+            expiration_date=data.expiration_date,
+            certification_date=data.certification_date,
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_lote_products_lot_id_product_id",
+            set_={
+                "quantity": LoteProduct.quantity + stmt.excluded.quantity,
+                "expiration_date": func.coalesce(stmt.excluded.expiration_date, LoteProduct.expiration_date),
+                "certification_date": func.coalesce(stmt.excluded.certification_date, LoteProduct.certification_date),
+                "updated_at": func.now(),
+            },
+        ).returning(LoteProduct)
+        try:
+            res = await db.execute(stmt, execution_options={"populate_existing": True})
+            lp = res.scalar_one()
+            await db.commit()
+        except IntegrityError as exc:
+            await db.rollback()
+            raise _missing_reference(exc) from exc
         return lp
 
     @staticmethod
-    async def update_lote_product(db: AsyncSession, lote_product_id: uuid.UUID, data: LoteProductUpdate) -> LoteProduct:
-        lp = await db.get(LoteProduct, lote_product_id)
-        if not lp:
+    async def bulk_add_or_increment_lote_products(db: AsyncSession, reader: LotItemRowReader) -> BulkLotItemsResponse:
+        await db.execute(_CREATE_LOT_ITEMS_STAGING)
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "lot_items_staging", records=reader.records(), columns=list(STAGING_COLUMNS)
+        )
+        await db.execute(text("SELECT set_config('app.bulk', 'on', true)"))
+        res = await db.execute(_MERGE_LOT_ITEMS_STAGING)
+        rows = res.all()
+        await db.commit()
+
+        results = list(reader.errors)
+        for row in rows:
+            if row.lote_product_id is not None:
+                results.append(BulkLotItemResult(
+                    row=row.row_no, status=BulkLotItemStatus.APPLIED, lote_product_id=row.lote_product_id
+                ))
+            elif not row.lot_exists:
+                results.append(BulkLotItemResult(row=row.row_no, status=BulkLotItemStatus.LOT_NOT_FOUND))
+            else:
+                results.append(BulkLotItemResult(row=row.row_no, status=BulkLotItemStatus.INVALID_PRODUCT))
+        results.sort(key=lambda r: r.row)
+        applied = sum(1 for r in results if r.status == BulkLotItemStatus.APPLIED)
+        return BulkLotItemsResponse(
+            received=reader.received, applied=applied, rejected=reader.received - applied, results=results
+        )
+
+    @staticmethod
+    async def update_lote_product(db: AsyncSession, lote_product_id: uuid.UUID, data: LoteProductUpdate) -> LoteProductRead:
+        stmt = (
+            update(LoteProduct.__table__)
+            .where(LoteProduct.id == lote_product_id)
+            .values(**_changes(data), updated_at=func.now())
+            .returning(*LOTE_PRODUCT_COLUMNS)
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise LookupError("LoteProduct not found")
-        if data.quantity is not None:
-            lp.quantity = data.quantity
-        if data.expiration_date is not None:
-            lp.expiration_date = data.expiration_date
-        if data.certification_date is not None:
-            lp.certification_date = data.certification_date
         await db.commit()
-        await db.refresh(lp)
-        return lp
+        return LoteProductRead.model_validate(row._mapping)
 
     @staticmethod
     async def remove_lote_product(db: AsyncSession, lote_product_id: uuid.UUID) -> None:
-        lp = await db.get(LoteProduct, lote_product_id)
-        if not lp:
+        stmt = delete(LoteProduct.__table__).where(LoteProduct.id == lote_product_id).returning(LoteProduct.id)
+        if (await db.execute(stmt)).first() is None:
             raise LookupError("LoteProduct not found")
-        await db.delete(lp)
         await db.commit()
 
     @staticmethod
-    async def list_lote_products(db: AsyncSession, lot_id: uuid.UUID) -> List[LoteProduct]:
-        q = (
-            select(LoteProduct)
-            .where(LoteProduct.lot_id == str(lot_id))
-            .options(selectinload(LoteProduct.product))
+    async def expiring_stock_report(
+        db: AsyncSession, start: date, end: date, bucket: ExpiryBucket, product_id: Optional[uuid.UUID] = None
+    ) -> ExpiringStockReport:
+        res = await db.execute(expiry_buckets_query(start, end, bucket, product_id))
+        return ExpiringStockReport(
+            start=start,
+            end=end,
+            bucket=bucket,
+            buckets=[ExpiringStockBucket.model_validate(row._mapping) for row in res.all()],
         )
-        res = await db.execute(q)
-        return list(res.scalars().all())
 
     @staticmethod
-    async def create_assignment(db: AsyncSession, data: AssignmentCreate) -> Assignment:
-        if not await db.get(Lote, data.lot_id):
+    async def list_lote_products(db: AsyncSession, lot_id: uuid.UUID) -> List[dict]:
+        res = await db.execute(select(*LOTE_PRODUCT_COLUMNS).where(LoteProduct.lot_id == lot_id))
+        return records(res)
+
+    @staticmethod
+    async def append_stock_movements(
+        db: AsyncSession, movements: Sequence[StockMovementCreate]
+    ) -> List[StockMovementRead]:
+        # Append-only: no lote_products row is read or locked; compaction folds these later.
+        rows = [{**m.model_dump(), "reason": m.reason.value} for m in movements]
+        try:
+            res = await db.execute(insert(StockMovement.__table__).returning(*MOVEMENT_COLUMNS), rows)
+            created = [StockMovementRead.model_validate(row._mapping) for row in res]
+            await db.commit()
+        except IntegrityError as exc:
+            await db.rollback()
+            raise _missing_reference(exc) from exc
+        return created
+
+    @staticmethod
+    async def get_lote_stock_at(db: AsyncSession, lot_id: uuid.UUID, at: Optional[datetime] = None) -> LotStockAt:
+        """Stock of a lot at `at` (default: now, pending movements included)."""
+        if (await db.execute(select(Lote.id).where(Lote.id == lot_id))).first() is None:
             raise LookupError("Lote not found")
-        obj = Assignment(
-            lot_id=str(data.lot_id),
-            flight_assigned=data.flight_assigned,
-            status=data.status,
+        # Ledger timestamps are now() stored without time zone, i.e. the session's
+        # local time; a naive `at` is taken as such and an aware one is converted
+        # to that zone by Postgres itself.
+        if at is None:
+            at = (await db.execute(select(func.localtimestamp()))).scalar_one()
+        elif at.tzinfo is not None:
+            local_at = func.timezone(func.current_setting("TimeZone"), literal(at, DateTime(timezone=True)))
+            at = (await db.execute(select(local_at))).scalar_one()
+        res = await db.execute(LOT_STOCK_AT, {"lot_id": lot_id, "at": at})
+        items = [LotStockAtItem.model_validate(row._mapping) for row in res if row.quantity != 0]
+        return LotStockAt(lot_id=lot_id, at=at, items=items)
+
+    @staticmethod
+    async def create_assignment(db: AsyncSession, data: AssignmentCreate) -> AssignmentRead:
+        stmt = (
+            insert(Assignment.__table__)
+            .values(lot_id=data.lot_id, flight_assigned=data.flight_assigned, status=data.status)
+            .returning(*ASSIGNMENT_COLUMNS)
         )
-        db.add(obj)
-        await db.commit()
-        await db.refresh(obj)
-        return obj
+        try:
+            row = (await db.execute(stmt)).one()
+            await db.commit()
+        except IntegrityError as exc:
+            await db.rollback()
+            raise _missing_reference(exc) from exc
+        return AssignmentRead.model_validate(row._mapping)
 
     @staticmethod
-    async def update_assignment(db: AsyncSession, assignment_id: uuid.UUID, data: AssignmentUpdate) -> Assignment:
-        obj = await db.get(Assignment, assignment_id)
-        if not obj:
+    async def update_assignment(db: AsyncSession, assignment_id: uuid.UUID, data: AssignmentUpdate) -> AssignmentRead:
+        stmt = (
+            update(Assignment.__table__)
+            .where(Assignment.id == assignment_id)
+            .values(**_changes(data), updated_at=func.now())
+            .returning(*ASSIGNMENT_COLUMNS)
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
             raise LookupError("Assignment not found")
-        if data.flight_assigned is not None:
-            obj.flight_assigned = data.flight_assigned
-        if data.status is not None:
-            obj.status = data.status
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        return AssignmentRead.model_validate(row._mapping)
 
     @staticmethod
     async def delete_assignment(db: AsyncSession, assignment_id: uuid.UUID) -> None:
-        obj = await db.get(Assignment, assignment_id)
-        if not obj:
+        stmt = delete(Assignment.__table__).where(Assignment.id == assignment_id).returning(Assignment.id)
+        if (await db.execute(stmt)).first() is None:
             raise LookupError("Assignment not found")
-        await db.delete(obj)
         await db.commit()
 
     @staticmethod
@@ -211,24 +524,153 @@ class CateringService:
             raise LookupError("Assignment not found")
         return obj
 
+    @staticmethod
+    async def transition_assignments(
+        db: AsyncSession, data: AssignmentBulkTransition
+    ) -> AssignmentBulkTransitionResponse:
+        from_status = AssignmentStatus(data.from_status.value)
+        to_status = AssignmentStatus(data.to_status.value)
+        if to_status not in ASSIGNMENT_TRANSITIONS[from_status]:
+            raise ValueError(f"Transition {from_status.value} -> {to_status.value} is not allowed")
+
+        if data.ids is not None:
+            selector = Assignment.id.in_(data.ids)
+        elif data.flight_assigned is not None:
+            selector = Assignment.flight_assigned == data.flight_assigned
+        else:
+            selector = Assignment.lot_id == data.lot_id
+
+        # One statement: lock the selected rows, move the ones still in
+        # from_status and report every selected row with its outcome.
+        targets = (
+            select(Assignment.id, Assignment.status).where(selector).with_for_update().cte("targets")
+        )
+        moved = (
+            update(Assignment)
+            .where(
+                Assignment.id == targets.c.id,
+                targets.c.status == from_status,
+                Assignment.status == from_status,
+            )
+            .values(status=to_status, updated_at=func.now())
+            .returning(Assignment.id)
+            .cte("moved")
+        )
+        stmt = (
+            select(targets.c.id, targets.c.status, moved.c.id.is_not(None).label("transitioned"))
+            .outerjoin(moved, moved.c.id == targets.c.id)
+        )
+        res = await db.execute(stmt)
+        rows = res.all()
+        await db.commit()
+
+        results = [
+            AssignmentTransitionResult(
+                id=row.id,
+                outcome=AssignmentTransitionOutcome.TRANSITIONED if row.transitioned
+                else AssignmentTransitionOutcome.STATUS_MISMATCH,
+                status=to_status.value if row.transitioned else row.status.value,
+            )
+            for row in rows
+        ]
+        if data.ids is not None:
+            found = {row.id for row in rows}
+            results.extend(
+                AssignmentTransitionResult(id=missing, outcome=AssignmentTransitionOutcome.NOT_FOUND)
+                for missing in dict.fromkeys(data.ids) if missing not in found
+            )
+        return AssignmentBulkTransitionResponse(
+            from_status=data.from_status,
+            to_status=data.to_status,
+            transitioned=sum(1 for r in results if r.outcome == AssignmentTransitionOutcome.TRANSITIONED),
+            results=results,
+        )
+
     @staticmethod
     async def upsert_assignment_for_lote(
         db: AsyncSession, lot_id: uuid.UUID, flight: Optional[str], status: AssignmentStatus = AssignmentStatus.DRAFT
-    ) -> Assignment:
-        res = await db.execute(select(Assignment).where(Assignment.lot_id == str(lot_id)))
-        obj = res.scalar_one_or_none()
-        if obj:
-            if flight is not None:
-                obj.flight_assigned = flight
-            obj.status = status
-        else:
-            if not await db.get(Lote, lot_id):
-                raise LookupError("Lote not found")
-            obj = Assignment(lot_id=str(lot_id), flight_assigned=flight, status=status)
-            db.add(obj)
+    ) -> AssignmentRead:
+        values = {"status": status, "updated_at": func.now()}
+        if flight is not None:
+            values["flight_assigned"] = flight
+        # A lot may carry several assignments; only its oldest one is upserted.
+        target = (
+            select(Assignment.id)
+            .where(Assignment.lot_id == lot_id)
+            .order_by(Assignment.created_at, Assignment.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(Assignment.__table__)
+            .where(Assignment.id == target)
+            .values(**values)
+            .returning(*ASSIGNMENT_COLUMNS)
+        )
+        row = (await db.execute(stmt)).one_or_none()
+        if row is None:
+            stmt = (
+                insert(Assignment.__table__)
+                .values(lot_id=lot_id, flight_assigned=flight, status=status)
+                .returning(*ASSIGNMENT_COLUMNS)
+            )
+            try:
+                row = (await db.execute(stmt)).one()
+            except IntegrityError as exc:
+                await db.rollback()
+                raise _missing_reference(exc) from exc
         await db.commit()
-        await db.refresh(obj)
-        return obj
+        return AssignmentRead.model_validate(row._mapping)
+
+    @staticmethod
+    async def allocate_fefo(db: AsyncSession, data: AllocationRequest) -> AllocationResponse:
+        as_of = data.as_of or date.today()
+        codes = {code for flight in data.flights for code in flight.products}
+        # Concurrent runs would pick the same free lots; serialise them.
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('fefo_allocation'))"))
+        res = await db.execute(eligible_stock_query(codes, as_of))
+        index = FefoIndex(res.all())
+        allocations = [index.allocate(flight) for flight in data.flights]
+
+        status = AssignmentStatus(data.status.value)
+        rows = [
+            {"lot_id": lot.lot_id, "flight_assigned": allocation.flight, "status": status}
+            for allocation in allocations
+            for lot in allocation.lots
+        ]
+        if rows and not data.dry_run:
+            await db.execute(insert(Assignment), rows)
+            await db.commit()
+        else:
+            await db.rollback()
+        return AllocationResponse(
+            flights=allocations, assignments_created=0 if data.dry_run else len(rows)
+        )
+
+    @staticmethod
+    async def get_flight_manifests(
+        db: AsyncSession, flights: Sequence[str], status: Optional[AssignmentStatus] = None
+    ) -> List[FlightManifest]:
+        flights = list(dict.fromkeys(flights))
+        res = await db.execute(flight_manifest_query(flights, status))
+        return build_manifests(flights, res.all())
+
+    @staticmethod
+    async def search(
+        db: AsyncSession, query: str, mode: SearchMode, kinds: Sequence[SearchKind], limit: int
+    ) -> SearchResponse:
+        query = query.strip()
+        if not query:
+            raise ValueError("Search query is blank")
+        if mode == "prefix" and code_trie.ready:
+            hits = [
+                SearchHit(kind=e.kind, id=e.id, code=e.code, name=e.name, score=len(query) / len(e.code))
+                for e in code_trie.trie.complete(query, limit, kinds)
+            ]
+            return SearchResponse(query=query, mode=mode, source="trie", hits=hits)
+        res = await db.execute(search_query(query, mode, kinds, limit))
+        hits = [SearchHit.model_validate(row._mapping) for row in res]
+        return SearchResponse(query=query, mode=mode, source="database", hits=hits)
 
     @staticmethod
     async def get_lotes_by_product(db: AsyncSession, product_id: uuid.UUID) -> List[Lote]:
@@ -242,11 +684,13 @@ class CateringService:
         return list(res.scalars().all())
 
     @staticmethod
-    async def get_products_in_lote(db: AsyncSession, lot_id: uuid.UUID) -> List[Product]:
-        q = (
-            select(Product)
-            .join(Product.lot_items)
-            .where(LoteProduct.lot_id == str(lot_id))
+    async def get_products_in_lote(db: AsyncSession, lot_id: uuid.UUID) -> List[ProductRead]:
+        res = await db.execute(
+            select(LoteProduct.product_id).where(LoteProduct.lot_id == str(lot_id)).distinct()
         )
-        res = await db.execute(q)
-        return list(res.scalars().all())
+        products, missing = product_cache.get_many(res.scalars().all())
+        if missing:
+            async with _catalog_session(db) as source:
+                res = await source.execute(select(Product).where(Product.id.in_(missing)))
+                products.extend(product_cache.put(obj) for obj in res.scalars().all())
+        return products
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .serialization import dumps_line, record
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+
+
+async def iter_partitions(stmt: Select, sessions: async_sessionmaker) -> AsyncIterator[Sequence[Any]]:
+    """
+    Runs `stmt` on a server-side cursor and yields it `STREAM_BATCH_SIZE` rows at a time.
+
+    The session is opened here rather than taken from `get_read_db` because the
+    body is produced after the endpoint returns; only one partition is held in
+    memory at any time. `sessions` comes from `get_read_sessionmaker`, so streams
+    follow the same primary/replica choice as the request's other reads.
+    """
+    async with sessions() as session:
+        stmt = stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+
+async def iter_ndjson_rows(stmt: Select, sessions: async_sessionmaker) -> AsyncIterator[bytes]:
+    # Core rows straight to orjson: select exactly the columns of the target schema.
+    async for partition in iter_partitions(stmt, sessions):
+        yield b"".join(dumps_line(record(row)) for row in partition)
+
+
+def ndjson_rows_response(stmt: Select, sessions: async_sessionmaker) -> StreamingResponse:
+    return StreamingResponse(iter_ndjson_rows(stmt, sessions), media_type=NDJSON_MEDIA_TYPE)
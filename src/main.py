@@ -1,32 +1,86 @@
 # main.py
 from __future__ import annotations
 
-from datetime import date as _date, datetime
-from typing import Literal, Optional, Any, Dict, List
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 
 from src.inventory.router import (
     products_router,
     lotes_router,
     lot_items_router,
     assignments_router,
+    manifests_router,
+    feed_router,
+    search_router,
 )
 
+from src.inventory.cache import PRODUCT_CATALOG_CHANNEL, product_cache
+from src.inventory.feed import INVENTORY_CHANGES_CHANNEL, change_feed
+from src.inventory.ledger import stock_compactor
+from src.inventory.search import code_trie
+
+from src.flights.router import flights_router
+from src.flights.cache import flight_schedules
+from src.flights.refresh import flight_store_refresher
+
 from src.agent.router import agent_router
 
-from src.utils import GetFlightsData
+from src.pubsub import listener
+
+from src.database import READ_DATABASE_URL
+from src.middleware import ReadYourWritesMiddleware
+from src.settings import settings
+
+from src.utils import close_http_client, start_http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    listener.subscribe(PRODUCT_CATALOG_CHANNEL, product_cache.on_notify)
+    listener.on_reconnect(product_cache.clear)
+    listener.subscribe(INVENTORY_CHANGES_CHANNEL, change_feed.publish)
+    listener.on_reconnect(change_feed.resync_all)
+    listener.subscribe(INVENTORY_CHANGES_CHANNEL, code_trie.on_change)
+    listener.on_reconnect(code_trie.mark_dirty)
+    await listener.start()
+    await stock_compactor.start()
+    await code_trie.start()
+    await flight_store_refresher.start()
+    try:
+        yield
+    finally:
+        await flight_store_refresher.stop()
+        await code_trie.stop()
+        await stock_compactor.stop()
+        await listener.stop()
+        await flight_schedules.stop()
+        await close_http_client()
+
 
 app = FastAPI(
     title="GateGroup Agentic CRM API",
     version="1.0.0",
     description="API for managing catering lots, products, and assignments",
+    lifespan=lifespan,
 )
 
+if READ_DATABASE_URL:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.db_read_your_writes_seconds)
+
+# Las respuestas 304 no llevan cuerpo; el resto se comprime por encima del umbral.
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
 app.include_router(products_router)
 app.include_router(lotes_router)
 app.include_router(lot_items_router)
 app.include_router(assignments_router)
+app.include_router(manifests_router)
+app.include_router(feed_router)
+app.include_router(search_router)
+app.include_router(flights_router)
 app.include_router(agent_router)
 
 
@@ -34,37 +88,3 @@ app.include_router(agent_router)
 async def root():
     return {"message": "Catering Inventory API is running"}
 
-
-@app.get("/api/flights/future", tags=["flights"], response_model=List[Dict[str, Any]])
-def get_future_flights(
-    date: _date = Query(..., description="Fecha futura en formato YYYY-MM-DD."),
-    iataCode: str = Query(..., min_length=3, max_length=3, description="Código IATA del aeropuerto (ej. BER)"),
-    type: Literal["departure", "arrival"] = Query("departure", description="Tipo de horario a consultar"),
-    airline_iata: Optional[str] = Query(None, description="Filtro por IATA de aerolínea (ej. LH)"),
-    airline_icao: Optional[str] = Query(None, description="Filtro por ICAO de aerolínea (ej. DLH)"),
-    flight_num: Optional[str] = Query(None, description="Número de vuelo sin prefijo de aerolínea (ej. 6258)"),
-) -> List[Dict[str, Any]]:
-    """
-    Proxy al endpoint flightsFuture de Aviation Edge con validaciones básicas.
-    """
-    today = datetime.utcnow().date()
-    if date <= today:
-        raise HTTPException(status_code=400, detail="La fecha debe ser futura (mañana en adelante).")
-
-    if not iataCode.isalpha():
-        raise HTTPException(status_code=400, detail="iataCode inválido; usa solo letras (p. ej., 'BER').")
-
-    try:
-        data = GetFlightsData.get_data(
-            date=date,
-            iataCode=iataCode,
-            type=type,
-            airline_iata=airline_iata,
-            airline_icao=airline_icao,
-            flight_num=flight_num,
-        )
-        return data
-    except ValueError as ve:
-        raise HTTPException(status_code=400, detail=str(ve)) from ve
-    except RuntimeError as re:
-        raise HTTPException(status_code=502, detail=str(re)) from re
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import math
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database import PRIMARY_UNTIL_COOKIE
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marca con una cookie a los clientes que acaban de escribir para que
+    `get_read_db` les sirva desde el primario durante `window` segundos. Solo
+    cuentan las peticiones que usaron `get_db` (endpoints de escritura); los
+    POST de solo lectura (p. ej. los `:batch`) no fijan la cookie.
+    """
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            wrote = (scope.get("state") or {}).get("primary_write", False)
+            if message["type"] == "http.response.start" and message["status"] < 400 and wrote:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_UNTIL_COOKIE}={time.time() + self.window:.3f}; "
+                    f"Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column 
-from sqlalchemy import text, func
+from sqlalchemy import BigInteger, text, func
 from datetime import datetime 
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -18,4 +18,8 @@ class Timestamp:
     created_at: Mapped[datetime] = mapped_column(server_default= func.now(), nullable = False)
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(),
                                                  onupdate=func.now(),
-                                                 nullable=False)
\ No newline at end of file
+                                                 nullable=False)
+
+class RowVersion:
+    # Lo incrementa un trigger en cada UPDATE (ver migración 9d4f2b6e8c31); base de los ETag.
+    version: Mapped[int] = mapped_column(BigInteger, server_default=text("1"), nullable=False)
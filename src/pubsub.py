@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+NotifyCallback = Callable[[Dict[str, Any]], None]
+
+
+async def pg_notify(db: AsyncSession, channel: str, payload: Dict[str, Any]) -> None:
+    """Encola un NOTIFY dentro de la transacción actual; Postgres lo entrega al hacer commit."""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload, default=str)},
+    )
+
+
+class PgNotifyListener:
+    """
+    Una sola conexión LISTEN por worker que reparte los NOTIFY entre callbacks.
+
+    Si la conexión se cae se reconecta con backoff; al reconectar se invocan los
+    hooks `on_reconnect` porque los avisos emitidos mientras tanto se perdieron.
+    """
+
+    def __init__(self, dsn: str, *, max_backoff: float = 30.0):
+        self.dsn = dsn
+        self.max_backoff = max_backoff
+        self._callbacks: Dict[str, List[NotifyCallback]] = {}
+        self._reconnect_hooks: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, callback: NotifyCallback) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def on_reconnect(self, hook: Callable[[], None]) -> None:
+        self._reconnect_hooks.append(hook)
+
+    async def start(self) -> None:
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run(), name="pg-notify-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, _conn: Any, _pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload) if payload else {}
+        except json.JSONDecodeError:
+            message = {"raw": payload}
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("NOTIFY callback failed on channel %s", channel)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: lost.set())
+                for channel in self._callbacks:
+                    await conn.add_listener(channel, self._dispatch)
+                if not first:
+                    for hook in self._reconnect_hooks:
+                        hook()
+                first = False
+                backoff = 1.0
+                await lost.wait()
+                logger.warning("LISTEN connection lost")
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Cualquier fallo (InterfaceError, un hook que revienta...) no debe
+                # matar la tarea: se registra y se reintenta con backoff.
+                logger.exception("LISTEN connection failed, retrying in %.0fs", backoff)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+def _listener_dsn() -> str:
+    # asyncpg quiere una URL libpq, sin el sufijo de driver de SQLAlchemy. LISTEN
+    # no sobrevive a un pooler en modo transacción, de ahí DATABASE_URL_LISTEN.
+    raw = settings.database_url_listen or settings.database_url_async
+    url = make_url(raw).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+listener = PgNotifyListener(_listener_dsn())
@@ -19,9 +19,71 @@ class Settings(BaseSettings):
 
     database_url_async_env: Optional[str] = Field(None, alias="DATABASE_URL_ASYNC")
     database_url_sync_env: Optional[str] = Field(None, alias="DATABASE_URL_SYNC")
+    database_url_read_async: Optional[str] = Field(None, alias="DATABASE_URL_READ_ASYNC")
+
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(100, alias="DB_STATEMENT_CACHE_SIZE")
+    db_prepared_statement_cache_size: int = Field(100, alias="DB_PREPARED_STATEMENT_CACHE_SIZE")
+    db_read_pool_size: int = Field(20, alias="DB_READ_POOL_SIZE")
+    db_read_max_overflow: int = Field(40, alias="DB_READ_MAX_OVERFLOW")
+    db_replica_max_lag_seconds: float = Field(5.0, alias="DB_REPLICA_MAX_LAG_SECONDS")
+    db_replica_lag_check_seconds: float = Field(2.0, alias="DB_REPLICA_LAG_CHECK_SECONDS")
+    db_read_your_writes_seconds: float = Field(5.0, alias="DB_READ_YOUR_WRITES_SECONDS")
+
+    db_pgbouncer_mode: bool = Field(False, alias="DB_PGBOUNCER_MODE")
+    database_url_listen: Optional[str] = Field(None, alias="DATABASE_URL_LISTEN")
+    db_statement_timeout_ms: Optional[int] = Field(None, alias="DB_STATEMENT_TIMEOUT_MS")
+    db_lock_timeout_ms: Optional[int] = Field(None, alias="DB_LOCK_TIMEOUT_MS")
+    db_idle_in_transaction_timeout_ms: Optional[int] = Field(None, alias="DB_IDLE_IN_TRANSACTION_TIMEOUT_MS")
     aviation_edge_api: str = Field(..., alias="AVIATION_EDGE_API")
     future_flights_url: str = Field(..., alias="FUTURE_FLIGHTS_URL")
 
+    product_cache_max_size: int = Field(10_000, alias="PRODUCT_CACHE_MAX_SIZE")
+    product_cache_ttl_seconds: float = Field(300.0, alias="PRODUCT_CACHE_TTL_SECONDS")
+
+    stock_compaction_interval_seconds: float = Field(30.0, alias="STOCK_COMPACTION_INTERVAL_SECONDS")
+    stock_compaction_batch_size: int = Field(50_000, alias="STOCK_COMPACTION_BATCH_SIZE")
+
+    feed_max_pending: int = Field(1000, alias="FEED_MAX_PENDING")
+    feed_heartbeat_seconds: float = Field(15.0, alias="FEED_HEARTBEAT_SECONDS")
+
+    search_trie_enabled: bool = Field(True, alias="SEARCH_TRIE_ENABLED")
+    search_trie_refresh_seconds: float = Field(5.0, alias="SEARCH_TRIE_REFRESH_SECONDS")
+
+    http_cache_max_age: int = Field(0, alias="HTTP_CACHE_MAX_AGE")
+    gzip_minimum_size: int = Field(1000, alias="GZIP_MINIMUM_SIZE")
+
+    flights_http2: bool = Field(True, alias="FLIGHTS_HTTP2")
+    flights_http_timeout_seconds: float = Field(15.0, alias="FLIGHTS_HTTP_TIMEOUT_SECONDS")
+    flights_http_max_connections: int = Field(100, alias="FLIGHTS_HTTP_MAX_CONNECTIONS")
+    flights_http_max_keepalive: int = Field(20, alias="FLIGHTS_HTTP_MAX_KEEPALIVE")
+    flights_http_keepalive_expiry: float = Field(30.0, alias="FLIGHTS_HTTP_KEEPALIVE_EXPIRY")
+    flights_http_max_connections_per_host: int = Field(20, alias="FLIGHTS_HTTP_MAX_CONNECTIONS_PER_HOST")
+
+    flights_upstream_rate_per_minute: float = Field(60.0, alias="FLIGHTS_UPSTREAM_RATE_PER_MINUTE")
+    flights_upstream_burst: int = Field(10, alias="FLIGHTS_UPSTREAM_BURST")
+    flights_upstream_max_wait_seconds: float = Field(5.0, alias="FLIGHTS_UPSTREAM_MAX_WAIT_SECONDS")
+    flights_breaker_failure_threshold: int = Field(5, alias="FLIGHTS_BREAKER_FAILURE_THRESHOLD")
+    flights_breaker_reset_seconds: float = Field(30.0, alias="FLIGHTS_BREAKER_RESET_SECONDS")
+
+    flights_cache_max_size: int = Field(1000, alias="FLIGHTS_CACHE_MAX_SIZE")
+    flights_cache_ttl_seconds: float = Field(300.0, alias="FLIGHTS_CACHE_TTL_SECONDS")
+    flights_cache_stale_seconds: float = Field(900.0, alias="FLIGHTS_CACHE_STALE_SECONDS")
+
+    flights_fanout_concurrency: int = Field(8, alias="FLIGHTS_FANOUT_CONCURRENCY")
+    flights_fanout_timeout_seconds: float = Field(20.0, alias="FLIGHTS_FANOUT_TIMEOUT_SECONDS")
+    flights_fanout_max_calls: int = Field(400, alias="FLIGHTS_FANOUT_MAX_CALLS")
+
+    flights_store_enabled: bool = Field(True, alias="FLIGHTS_STORE_ENABLED")
+    flights_store_max_age_seconds: float = Field(3600.0, alias="FLIGHTS_STORE_MAX_AGE_SECONDS")
+    flights_store_refresh_age_seconds: float = Field(1800.0, alias="FLIGHTS_STORE_REFRESH_AGE_SECONDS")
+    flights_store_refresh_interval_seconds: float = Field(300.0, alias="FLIGHTS_STORE_REFRESH_INTERVAL_SECONDS")
+    flights_store_refresh_batch_size: int = Field(20, alias="FLIGHTS_STORE_REFRESH_BATCH_SIZE")
+
     @computed_field
     @property
     def database_url_async(self) -> str:
@@ -1,11 +1,22 @@
 from __future__ import annotations
 from datetime import date as _date
-from typing import Literal, Optional, Dict, Any, List
+from typing import AsyncIterator, Literal, Optional, Dict, Any, List
+from urllib.parse import urlsplit
 import os
-import requests
+import httpx
+import ijson
+import orjson
 
 from src.settings import get_settings 
 
+class UpstreamNetworkError(RuntimeError):
+    """
+    Fallo de red, timeout, 5xx o 429 al llamar a Aviation Edge: lo que cuenta
+    contra el circuit breaker. Los demás 4xx y los errores reportados en el
+    cuerpo de la respuesta son RuntimeError a secas.
+    """
+
+
 def _get_base_url() -> str:
     s = get_settings()
     url = s.future_flights_url or os.getenv("FUTURE_FLIGHTS_URL")
@@ -20,9 +31,149 @@ def _get_api_key() -> str:
         raise RuntimeError("AVIATION_EDGE_API no está configurada.")
     return key
 
+
+# Cliente HTTP compartido por el proceso: keep-alive y HTTP/2 hacia Aviation Edge
+# en lugar de abrir una conexión TCP+TLS por llamada.
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _build_http_client() -> httpx.AsyncClient:
+    s = get_settings()
+    limits = httpx.Limits(
+        max_connections=s.flights_http_max_connections,
+        max_keepalive_connections=s.flights_http_max_keepalive,
+        keepalive_expiry=s.flights_http_keepalive_expiry,
+    )
+    # httpx solo limita el pool completo; el host de Aviation Edge lleva su propio
+    # transporte para que no acapare (ni se quede sin) conexiones del resto.
+    upstream = urlsplit(_get_base_url())
+    host_limits = httpx.Limits(
+        max_connections=s.flights_http_max_connections_per_host,
+        max_keepalive_connections=min(s.flights_http_max_keepalive, s.flights_http_max_connections_per_host),
+        keepalive_expiry=s.flights_http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        http2=s.flights_http2,
+        limits=limits,
+        timeout=httpx.Timeout(s.flights_http_timeout_seconds),
+        mounts={
+            f"{upstream.scheme}://{upstream.netloc}": httpx.AsyncHTTPTransport(
+                http2=s.flights_http2, limits=host_limits,
+            ),
+        },
+    )
+
+async def start_http_client() -> httpx.AsyncClient:
+    """
+    Crea el cliente compartido (se llama en el lifespan de la app).
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = _build_http_client()
+    return _http_client
+
+async def close_http_client() -> None:
+    """
+    Cierra las conexiones abiertas del cliente compartido.
+    """
+    global _http_client
+    if _http_client is not None:
+        client, _http_client = _http_client, None
+        await client.aclose()
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Cliente compartido; si aún no existe (p. ej. en un script o test fuera del lifespan) se crea al primer uso.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = _build_http_client()
+    return _http_client
+
+
+def _build_params(
+    date: _date,
+    iataCode: str,
+    type: str,
+    airline_iata: Optional[str],
+    airline_icao: Optional[str],
+    flight_num: Optional[str],
+) -> Dict[str, Any]:
+    if type not in ("departure", "arrival"):
+        raise ValueError('type debe ser "departure" o "arrival".')
+
+    params: Dict[str, Any] = {
+        "key": _get_api_key(),
+        "type": type,
+        "iataCode": iataCode.upper().strip(),
+        "date": date.isoformat(),
+    }
+    if airline_iata:
+        params["airline_iata"] = airline_iata.upper().strip()
+    if airline_icao:
+        params["airline_icao"] = airline_icao.upper().strip()
+    if flight_num:
+        params["flight_num"] = str(flight_num).strip()
+    return params
+
+def _check_payload(data: Any) -> List[Dict[str, Any]]:
+    if isinstance(data, dict) and data.get("error"):
+        raise RuntimeError(f"API error: {data.get('error')}")
+    if not isinstance(data, list):
+        raise RuntimeError(f"Respuesta inesperada: {str(data)[:300]}")
+    return data
+
+
+class _AsyncChunkReader:
+    """
+    Adapta el stream de httpx a la interfaz read() asíncrona que espera ijson.
+    """
+    def __init__(self, first: bytes, chunks: AsyncIterator[bytes]):
+        self._pending: Optional[bytes] = first
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson llama read(0) para detectar si el stream es de bytes o texto.
+            return b""
+        if self._pending is not None:
+            chunk, self._pending = self._pending, None
+            return chunk
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+async def _parse_stream(chunks: AsyncIterator[bytes]) -> List[Dict[str, Any]]:
+    """
+    Decodifica la respuesta conforme llega: los vuelos del arreglo se construyen
+    uno a uno sin retener el cuerpo completo (varios MB en aeropuertos grandes).
+    Un objeto en la raíz es un error de la API y se lee entero.
+    """
+    first = b""
+    async for chunk in chunks:
+        first = chunk.lstrip()
+        if first:
+            break
+    if not first.startswith(b"["):
+        rest = [first]
+        async for chunk in chunks:
+            rest.append(chunk)
+        try:
+            data = orjson.loads(b"".join(rest))
+        except orjson.JSONDecodeError:
+            data = b"".join(rest)[:300].decode("utf-8", "replace")
+        return _check_payload(data)
+    try:
+        return [
+            item async for item in ijson.items_async(_AsyncChunkReader(first, chunks), "item", use_float=True)
+        ]
+    except ijson.JSONError as exc:
+        raise RuntimeError(f"Respuesta inesperada: {exc}") from exc
+
+
 class GetFlightsData:
     @staticmethod
-    def get_data(
+    async def aget_data(
         date: _date,
         iataCode: str,
         type: Literal["departure", "arrival"] = "departure",
@@ -30,37 +181,24 @@ class GetFlightsData:
         airline_iata: Optional[str] = None,
         airline_icao: Optional[str] = None,
         flight_num: Optional[str] = None,
-        timeout: int = 15,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
-        if type not in ("departure", "arrival"):
-            raise ValueError('type debe ser "departure" o "arrival".')
-
+        """
+        Consulta Aviation Edge sobre el cliente compartido; el cuerpo se decodifica
+        en streaming (ver _parse_stream). Lo llama src.flights.upstream.
+        """
+        params = _build_params(date, iataCode, type, airline_iata, airline_icao, flight_num)
         base_url = _get_base_url()
-        key = _get_api_key()
-
-        params: Dict[str, Any] = {
-            "key": key,
-            "type": type,
-            "iataCode": iataCode.upper().strip(),
-            "date": date.isoformat(),
-        }
-        if airline_iata:
-            params["airline_iata"] = airline_iata.upper().strip()
-        if airline_icao:
-            params["airline_icao"] = airline_icao.upper().strip()
-        if flight_num:
-            params["flight_num"] = str(flight_num).strip()
+        request_timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
 
         try:
-            resp = requests.get(base_url, params=params, timeout=timeout)
-            resp.raise_for_status()
-        except requests.RequestException as exc:
-            raise RuntimeError(f"Error de red al llamar a Aviation Edge: {exc}") from exc
-
-        data = resp.json()
-        if isinstance(data, dict) and data.get("error"):
-            raise RuntimeError(f"API error: {data.get('error')}")
-        if not isinstance(data, list):
-            raise RuntimeError(f"Respuesta inesperada: {str(data)[:300]}")
-
-        return data
+            async with get_http_client().stream("GET", base_url, params=params, timeout=request_timeout) as resp:
+                resp.raise_for_status()
+                return await _parse_stream(resp.aiter_bytes())
+        except httpx.HTTPStatusError as exc:
+            code = exc.response.status_code
+            if code >= 500 or code == 429:
+                raise UpstreamNetworkError(f"Aviation Edge respondió {code}: {exc}") from exc
+            raise RuntimeError(f"Aviation Edge rechazó la petición ({code}): {exc}") from exc
+        except httpx.HTTPError as exc:
+            raise UpstreamNetworkError(f"Error de red al llamar a Aviation Edge: {exc}") from exc
@@ -0,0 +1,18 @@
+from src.flights.protection import TokenBucket
+
+
+def test_admits_matches_what_reserve_grants():
+    bucket = TokenBucket(rate=1.0, burst=10, max_wait=5.0)
+    admitted = bucket.admits(20.0)
+    assert admitted == 15
+
+    granted = 0
+    while bucket.reserve() is not None:
+        granted += 1
+    assert granted == admitted
+    assert bucket.admits(20.0) == 0
+
+
+def test_admits_is_bounded_by_the_call_timeout_and_unlimited_when_disabled():
+    assert TokenBucket(rate=1.0, burst=10, max_wait=5.0).admits(2.0) == 12
+    assert TokenBucket(rate=0.0, burst=10, max_wait=5.0).admits(2.0) is None
@@ -0,0 +1,80 @@
+import asyncio
+
+import asyncpg
+
+from src import pubsub
+from src.pubsub import PgNotifyListener
+
+
+class FakeConnection:
+    def __init__(self):
+        self.channels = []
+        self._on_lost = []
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self._on_lost.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.channels.append(channel)
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+    def drop(self):
+        self.closed = True
+        for callback in self._on_lost:
+            callback(self)
+
+
+def test_listener_survives_interface_error_on_reconnect(monkeypatch):
+    first, second = FakeConnection(), FakeConnection()
+    attempts = iter([first, asyncpg.InterfaceError("cannot perform operation: connection is closed"), second])
+    connected = asyncio.Event()
+    sleeps = []
+
+    async def fake_connect(dsn):
+        outcome = next(attempts)
+        if isinstance(outcome, Exception):
+            raise outcome
+        loop.call_soon(connected.set)
+        return outcome
+
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(pubsub.asyncpg, "connect", fake_connect)
+    monkeypatch.setattr(pubsub.asyncio, "sleep", fake_sleep)
+
+    reconnects = []
+    listener = PgNotifyListener("postgresql://test@localhost/test")
+    listener.subscribe("inventory_changes", lambda message: None)
+    listener.on_reconnect(lambda: reconnects.append(True))
+
+    async def scenario():
+        await listener.start()
+        await connected.wait()
+        connected.clear()
+        await real_sleep(0)
+        first.drop()
+        await asyncio.wait_for(connected.wait(), 1)
+        await real_sleep(0)
+        assert not listener._task.done()
+        await listener.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(scenario())
+    finally:
+        loop.close()
+
+    assert sleeps == [1.0]
+    assert reconnects == [True]
+    assert second.channels == ["inventory_changes"]
+    assert second.closed
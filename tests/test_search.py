@@ -0,0 +1,39 @@
+import uuid
+
+from src.inventory.search import CodeTrie, CodeTrieIndex, TrieEntry
+
+
+def _entry(code, kind="product"):
+    return TrieEntry(kind=kind, id=uuid.uuid4(), code=code, name=None)
+
+
+def test_trie_add_replaces_and_remove_prunes():
+    abc, abd = _entry("ABC-1"), _entry("ABD-2")
+    trie = CodeTrie([abc, abd])
+
+    renamed = TrieEntry(kind="product", id=abc.id, code="XYZ-1", name=None)
+    trie.add(renamed)
+    assert trie.size == 2
+    assert trie.complete("ab", 10) == [abd]
+    assert trie.complete("xyz", 10) == [renamed]
+
+    trie.remove("product", abd.id)
+    trie.remove("product", abd.id)
+    assert trie.size == 1
+    assert trie.complete("a", 10) == []
+    assert "a" not in trie._root.children
+
+
+def test_index_queues_notify_ids_and_only_marks_dirty_without_one():
+    index = CodeTrieIndex(interval=5)
+    index._dirty = False
+    product_id, lot_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    index.on_change({"table": "products", "op": "update", "product_id": product_id, "lot_id": None})
+    index.on_change({"table": "lotes", "op": "insert", "product_id": None, "lot_id": lot_id})
+    index.on_change({"table": "lote_products", "op": "insert", "product_id": product_id, "lot_id": lot_id})
+    assert index._pending == {"product": {product_id}, "lote": {lot_id}}
+    assert not index._dirty
+
+    index.on_change({"table": "products", "op": "delete", "product_id": None})
+    assert index._dirty